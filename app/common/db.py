@@ -0,0 +1,17 @@
+import os
+import pymysql
+
+
+def connect_maria() -> pymysql.connections.Connection:
+    """환경 변수(DB_HOST/DB_PORT/DB_USER/DB_PASSWORD/DB_NAME) 기반 MariaDB 연결 생성
+
+    배치 스크립트는 실행 내내 연결 하나만 사용하므로 풀 없이 단일 연결을 연다.
+    """
+    return pymysql.connect(
+        host=os.getenv('DB_HOST'),
+        port=int(os.getenv('DB_PORT')),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        database=os.getenv('DB_NAME'),
+        charset='utf8mb4'
+    )
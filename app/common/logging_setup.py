@@ -0,0 +1,21 @@
+import os
+import queue
+import logging
+import logging.handlers
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """큐 기반 로깅 설정 (LOG_LEVEL 환경 변수, 기본 INFO) - 로그 출력은 백그라운드 스레드에서 처리
+
+    반환된 리스너는 프로세스 종료 전에 stop()으로 남은 로그를 내보내야 한다.
+    """
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    # 큐에는 메시지만 담고 시간/레벨 등 포맷은 리스너의 stream_handler에서 한 번만 적용
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper(), handlers=[queue_handler])
+    listener.start()
+    return listener
@@ -1,66 +1,116 @@
 import os
+import logging
+import sys
+from pathlib import Path
 import pymongo
+from pymongo.write_concern import WriteConcern
 import pymysql
 from dotenv import load_dotenv
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from typing import Dict, List, Optional
 import json
 
+# 공용 모듈(app/common) 임포트 경로 추가
+_APP_DIR = str(Path(__file__).resolve().parents[2])
+if _APP_DIR not in sys.path:
+    sys.path.append(_APP_DIR)
+from common.db import connect_maria
+from common.logging_setup import setup_logging
+
 # 환경 변수 로드
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# 랭킹 일괄 저장 시 bulk_write 청크 크기와 동시 실행 스레드 수 (MongoClient maxPoolSize 이하)
+FLUSH_CHUNK_SIZE = 100
+FLUSH_MAX_WORKERS = 8
+
+# 결과 요약 조회 커서 배치 크기 (작은 요약 문서를 적은 getMore 왕복으로 수신)
+SUMMARY_BATCH_SIZE = 500
+
+# users 미러 교체용 스테이징 컬렉션 (sync_user_mirror에서 rename으로 users와 교체)
+USER_MIRROR_STAGING_COLLECTION = 'users_mirror_staging'
+
+def _member_document(rank: int, name: str, overall_final_score: float,
+                     quantitative: float, qualitative: float, peer: float) -> Dict:
+    """팀 랭킹 구성원 문서 생성 (고정 키 리터럴이라 dict 생성이 한 번의 상수 키 빌드로 끝남)"""
+    return {
+        'rank': rank,
+        'name': name,
+        'overall_final_score': overall_final_score,
+        'quantitative': quantitative,
+        'qualitative': qualitative,
+        'peer': peer
+    }
+
 class AnnualTeamRankingSystem:
     def __init__(self):
         self.maria_connection = None
         self.mongo_client = None
         self.mongo_db = None
+        self._pending_ops = []
+        self._batch_now = None
         
     def connect_databases(self):
         """데이터베이스 연결"""
         try:
             # MariaDB 연결
-            self.maria_connection = pymysql.connect(
-                host=os.getenv('DB_HOST'),
-                port=int(os.getenv('DB_PORT')),
-                user=os.getenv('DB_USER'),
-                password=os.getenv('DB_PASSWORD'),
-                database=os.getenv('DB_NAME'),
-                charset='utf8mb4'
-            )
-            print('✅ MariaDB 연결 성공')
+            self.maria_connection = connect_maria()
+            logger.info('✅ MariaDB 연결 성공')
             
             # MongoDB 연결
             mongo_url = f"mongodb://{os.getenv('MONGO_USER')}:{os.getenv('MONGO_PASSWORD')}@{os.getenv('MONGO_HOST')}:{os.getenv('MONGO_PORT')}/{os.getenv('MONGO_DB_NAME')}?authSource=admin"
             
-            self.mongo_client = pymongo.MongoClient(mongo_url, serverSelectionTimeoutMS=5000)
+            self.mongo_client = pymongo.MongoClient(
+                mongo_url,
+                serverSelectionTimeoutMS=5000,
+                compressors='zstd,zlib',
+                maxPoolSize=32,
+                retryWrites=True
+            )
             self.mongo_client.admin.command('ping')
             self.mongo_db = self.mongo_client[os.getenv('MONGO_DB_NAME')]
-            print('✅ MongoDB 연결 성공')
+            logger.info('✅ MongoDB 연결 성공')
+            
+            # 조회/업서트 필터용 인덱스
+            self.mongo_db['final_score_results'].create_index(
+                [('type', 1), ('evaluated_year', 1)]
+            )
+            # 팀 랭킹 문서만 대상 (personal-quarter 문서에는 organization_id가 없음)
+            self.mongo_db['ranking_results'].create_index(
+                [('type', 1), ('organization_id', 1), ('evaluated_year', 1), ('evaluated_quarter', 1)],
+                unique=True,
+                partialFilterExpression={'organization_id': {'$exists': True}}
+            )
             
         except Exception as e:
-            print(f'❌ 데이터베이스 연결 오류: {e}')
+            logger.error('❌ 데이터베이스 연결 오류: %s', e)
             raise e
     
     def get_user_name_mapping(self) -> Dict[int, str]:
         """사용자 ID별 이름 매핑"""
         try:
-            with self.maria_connection.cursor(pymysql.cursors.DictCursor) as cursor:
+            # SSDictCursor로 결과를 스트리밍 (fetchall 중간 리스트 생략)
+            with self.maria_connection.cursor(pymysql.cursors.SSDictCursor) as cursor:
                 query = "SELECT id, name FROM users WHERE name IS NOT NULL"
                 cursor.execute(query)
-                users = cursor.fetchall()
+                user_mapping = {user['id']: user['name'] for user in cursor}
             
-            user_mapping = {user['id']: user['name'] for user in users}
-            print(f'✅ 사용자 이름 매핑 완료: {len(user_mapping)}명')
+            logger.info('✅ 사용자 이름 매핑 완료: %s명', len(user_mapping))
             return user_mapping
             
         except Exception as e:
-            print(f'❌ 사용자 이름 매핑 오류: {e}')
+            logger.error('❌ 사용자 이름 매핑 오류: %s', e)
             return {}
     
     def get_user_organization_mapping(self) -> Dict[int, Dict]:
         """사용자 ID별 조직 정보 매핑"""
         try:
-            with self.maria_connection.cursor(pymysql.cursors.DictCursor) as cursor:
+            # SSDictCursor로 결과를 스트리밍 (fetchall 중간 리스트 생략)
+            with self.maria_connection.cursor(pymysql.cursors.SSDictCursor) as cursor:
                 query = """
                     SELECT u.id, u.name, u.organization_id, o.name as org_name
                     FROM users u
@@ -69,21 +119,43 @@ class AnnualTeamRankingSystem:
                     ORDER BY u.organization_id, u.id
                 """
                 cursor.execute(query)
-                users = cursor.fetchall()
-            
-            user_org_mapping = {}
-            for user in users:
-                user_org_mapping[user['id']] = {
-                    'name': user['name'],
-                    'organization_id': user['organization_id'],
-                    'organization_name': user['org_name'] or f"조직{user['organization_id']}"
+                user_org_mapping = {
+                    user['id']: {
+                        'name': user['name'],
+                        'organization_id': user['organization_id'],
+                        'organization_name': user['org_name'] or f"조직{user['organization_id']}"
+                    }
+                    for user in cursor
                 }
             
-            print(f'✅ 사용자 조직 매핑 완료: {len(user_org_mapping)}명')
+            logger.info('✅ 사용자 조직 매핑 완료: %s명', len(user_org_mapping))
             return user_org_mapping
             
         except Exception as e:
-            print(f'❌ 사용자 조직 매핑 오류: {e}')
+            logger.error('❌ 사용자 조직 매핑 오류: %s', e)
+            return {}
+    
+    def get_organizations(self) -> Dict[int, str]:
+        """사용자가 소속된 조직 ID별 이름 매핑 (조직당 1행)"""
+        try:
+            with self.maria_connection.cursor(pymysql.cursors.DictCursor) as cursor:
+                query = """
+                    SELECT DISTINCT u.organization_id,
+                           COALESCE(o.name, CONCAT('조직', u.organization_id)) as org_name
+                    FROM users u
+                    LEFT JOIN organizations o ON u.organization_id = o.division_id
+                    WHERE u.organization_id IS NOT NULL
+                    ORDER BY u.organization_id
+                """
+                cursor.execute(query)
+                rows = cursor.fetchall()
+            
+            organizations = {row['organization_id']: row['org_name'] for row in rows}
+            logger.info('✅ 조직 목록 조회 완료: %s개', len(organizations))
+            return organizations
+            
+        except Exception as e:
+            logger.error('❌ 조직 목록 조회 오류: %s', e)
             return {}
     
     def get_annual_final_scores(self, year: int) -> Dict[int, Dict]:
@@ -91,92 +163,95 @@ class AnnualTeamRankingSystem:
         try:
             collection = self.mongo_db['final_score_results']
             
-            # personal-final-score-annual 타입 문서 조회
-            final_score_doc = collection.find_one({
-                'type': 'personal-final-score-annual',
-                'evaluated_year': year
-            })
-            
-            if not final_score_doc:
-                print(f"❌ {year}년 연말 최종 점수 데이터를 찾을 수 없습니다.")
-                return {}
-            
+            # personal-final-score-annual 문서의 users 서브문서를 서버에서 평탄화/반올림 (없으면 0점)
+            pipeline = [
+                {'$match': {
+                    'type': 'personal-final-score-annual',
+                    'evaluated_year': year
+                }},
+                {'$limit': 1},
+                {'$project': {'_id': 0, 'u': {'$objectToArray': '$users'}}},
+                {'$unwind': '$u'},
+                {'$project': {
+                    'user_id': '$u.k',
+                    'overall_final_score': {'$round': [{'$ifNull': ['$u.v.final_score_info.overall_final_score', 0]}, 2]},
+                    'quantitative': {'$round': [{'$ifNull': ['$u.v.final_score_info.category_averages.quantitative', 0]}, 2]},
+                    'qualitative': {'$round': [{'$ifNull': ['$u.v.final_score_info.category_averages.qualitative', 0]}, 2]},
+                    'peer': {'$round': [{'$ifNull': ['$u.v.final_score_info.category_averages.peer', 0]}, 2]}
+                }}
+            ]
+            
+            # 반올림/기본값은 파이프라인에서 처리되므로 루프는 키 변환만 수행 (전역/속성 조회를 지역 변수로)
             users_scores = {}
-            users_data = final_score_doc.get('users', {})
-            
-            for user_id_str, user_data in users_data.items():
+            _int = int
+            for row in collection.aggregate(pipeline):
+                user_id_str = row.pop('user_id')
                 try:
-                    user_id = int(user_id_str)
-                    final_score_info = user_data.get('final_score_info', {})
-                    category_averages = final_score_info.get('category_averages', {})
-                    
-                    # 각 점수 추출 (없으면 0점)
-                    overall_score = final_score_info.get('overall_final_score', 0)
-                    quantitative = category_averages.get('quantitative', 0)
-                    qualitative = category_averages.get('qualitative', 0)
-                    peer = category_averages.get('peer', 0)
-                    
-                    users_scores[user_id] = {
-                        'overall_final_score': round(overall_score, 2),
-                        'quantitative': round(quantitative, 2),
-                        'qualitative': round(qualitative, 2),
-                        'peer': round(peer, 2)
-                    }
-                    
+                    users_scores[_int(user_id_str)] = row
                 except (ValueError, TypeError) as e:
-                    print(f"⚠️ 사용자 {user_id_str} 점수 처리 오류: {e}")
+                    logger.warning("⚠️ 사용자 %s 점수 처리 오류: %s", user_id_str, e)
                     continue
             
-            print(f'✅ {year}년 연말 점수 데이터 로드 완료: {len(users_scores)}명')
+            if not users_scores:
+                logger.error("❌ %s년 연말 최종 점수 데이터를 찾을 수 없습니다.", year)
+                return {}
+            
+            logger.info('✅ %s년 연말 점수 데이터 로드 완료: %s명', year, len(users_scores))
             return users_scores
             
         except Exception as e:
-            print(f'❌ 연말 점수 데이터 조회 오류: {e}')
+            logger.error('❌ 연말 점수 데이터 조회 오류: %s', e)
             return {}
     
+    def _build_team_ranking(self, org_members: List[tuple],
+                            annual_scores: Dict) -> List[Dict]:
+        """특정 팀의 overall_final_score 기준 정렬 랭킹 생성 (연말/분기 공용)"""
+        # 조직 구성원 중 점수 데이터가 있는 사용자만 사용
+        org_users = []
+        for user_id, name in org_members:
+            if user_id in annual_scores:
+                scores = annual_scores[user_id]
+                org_users.append({
+                    'user_id': user_id,
+                    'name': name,
+                    'overall': scores['overall_final_score'],
+                    'scores': scores
+                })
+        
+        # overall_final_score 기준으로 내림차순 정렬
+        org_users.sort(key=itemgetter('overall'), reverse=True)
+        
+        # 각 사용자의 랭킹 데이터 생성
+        return [
+            _member_document(
+                rank,
+                user['name'],
+                user['overall'],
+                user['scores']['quantitative'],
+                user['scores']['qualitative'],
+                user['scores']['peer']
+            )
+            for rank, user in enumerate(org_users, 1)
+        ]
+    
     def generate_team_annual_ranking(self, org_id: int, org_name: str, year: int, 
-                                   user_org_mapping: Dict, annual_scores: Dict) -> Dict:
+                                   team_ranking: List[Dict]) -> Dict:
         """특정 팀의 연말 랭킹 데이터 생성"""
         try:
-            print(f"\n🔄 {org_name} (조직 {org_id})의 {year}년 연말 랭킹 생성 시작")
+            logger.info("🔄 %s (조직 %s)의 %s년 연말 랭킹 생성 시작", org_name, org_id, year)
             
-            # 해당 조직의 사용자들 필터링
-            org_users = []
-            for user_id, user_info in user_org_mapping.items():
-                if user_info['organization_id'] == org_id and user_id in annual_scores:
-                    org_users.append({
-                        'user_id': user_id,
-                        'name': user_info['name'],
-                        'scores': annual_scores[user_id]
-                    })
-            
-            if not org_users:
-                print(f"❌ 조직 {org_id}에 속한 사용자가 없거나 점수 데이터가 없습니다.")
+            if not team_ranking:
+                logger.error("❌ 조직 %s에 속한 사용자가 없거나 점수 데이터가 없습니다.", org_id)
                 return None
             
-            # overall_final_score 기준으로 내림차순 정렬
-            org_users.sort(key=lambda x: x['scores']['overall_final_score'], reverse=True)
-            
-            print(f"📊 조직 {org_id}: {len(org_users)}명 랭킹 생성")
-            
-            # 각 사용자의 랭킹 데이터 생성
-            team_ranking = []
-            for rank, user in enumerate(org_users, 1):
-                member_data = {
-                    'rank': rank,
-                    'name': user['name'],
-                    'overall_final_score': user['scores']['overall_final_score'],
-                    'quantitative': user['scores']['quantitative'],
-                    'qualitative': user['scores']['qualitative'],
-                    'peer': user['scores']['peer']
-                }
-                team_ranking.append(member_data)
+            logger.info("📊 조직 %s: %s명 랭킹 생성", org_id, len(team_ranking))
             
             # 상위 5명 출력
-            print(f"🏆 {org_name} 상위 5명:")
+            logger.debug("🏆 %s 상위 5명:", org_name)
             for member in team_ranking[:5]:
-                print(f"   {member['rank']}위: {member['name']} ({member['overall_final_score']}점)")
+                logger.debug("   %s위: %s (%s점)", member['rank'], member['name'], member['overall_final_score'])
             
+            now = self._batch_now or datetime.now()
             return {
                 'type': 'team-annual',
                 'organization_id': org_id,
@@ -184,56 +259,29 @@ class AnnualTeamRankingSystem:
                 'evaluated_year': year,
                 'total_members': len(team_ranking),
                 'team_ranking': team_ranking,
-                'created_at': datetime.now(),
-                'updated_at': datetime.now()
+                'created_at': now,
+                'updated_at': now
             }
             
         except Exception as e:
-            print(f'❌ 조직 {org_id} 연말 랭킹 생성 오류: {e}')
-            import traceback
-            traceback.print_exc()
+            logger.exception('❌ 조직 %s 연말 랭킹 생성 오류: %s', org_id, e)
             return None
     
     def generate_quarterly_rankings_for_annual(self, org_id: int, org_name: str, 
-                                             year: int, user_org_mapping: Dict, 
-                                             annual_scores: Dict) -> List[Dict]:
+                                             year: int, team_ranking: List[Dict]) -> List[Dict]:
         """연말 보고서용 분기별 랭킹 데이터 생성 (4개 분기)"""
         try:
-            print(f"\n🔄 {org_name} (조직 {org_id})의 {year}년 분기별 랭킹 생성 시작")
+            logger.info("🔄 %s (조직 %s)의 %s년 분기별 랭킹 생성 시작", org_name, org_id, year)
             
-            # 해당 조직의 사용자들 필터링
-            org_users = []
-            for user_id, user_info in user_org_mapping.items():
-                if user_info['organization_id'] == org_id and user_id in annual_scores:
-                    org_users.append({
-                        'user_id': user_id,
-                        'name': user_info['name'],
-                        'scores': annual_scores[user_id]
-                    })
-            
-            if not org_users:
-                print(f"❌ 조직 {org_id}에 속한 사용자가 없거나 점수 데이터가 없습니다.")
+            if not team_ranking:
+                logger.error("❌ 조직 %s에 속한 사용자가 없거나 점수 데이터가 없습니다.", org_id)
                 return []
             
-            # overall_final_score 기준으로 내림차순 정렬
-            org_users.sort(key=lambda x: x['scores']['overall_final_score'], reverse=True)
-            
+            # 1~4분기 모두 동일한 랭킹 (연말 데이터 기준) - 공유 참조
+            now = self._batch_now or datetime.now()
             quarterly_rankings = []
             
-            # 1~4분기 각각에 대해 동일한 랭킹 생성 (연말 데이터 기준)
             for quarter in range(1, 5):
-                team_ranking = []
-                for rank, user in enumerate(org_users, 1):
-                    member_data = {
-                        'rank': rank,
-                        'name': user['name'],
-                        'overall_final_score': user['scores']['overall_final_score'],
-                        'quantitative': user['scores']['quantitative'],
-                        'qualitative': user['scores']['qualitative'],
-                        'peer': user['scores']['peer']
-                    }
-                    team_ranking.append(member_data)
-                
                 quarterly_ranking = {
                     'type': 'team-quarter',
                     'organization_id': org_id,
@@ -242,27 +290,25 @@ class AnnualTeamRankingSystem:
                     'evaluated_quarter': quarter,
                     'total_members': len(team_ranking),
                     'team_ranking': team_ranking,
-                    'created_at': datetime.now(),
-                    'updated_at': datetime.now()
+                    'created_at': now,
+                    'updated_at': now
                 }
                 
                 quarterly_rankings.append(quarterly_ranking)
-                print(f"📊 {org_name} {quarter}분기 랭킹 생성 완료: {len(team_ranking)}명")
+                logger.debug("📊 %s %s분기 랭킹 생성 완료: %s명", org_name, quarter, len(team_ranking))
             
             return quarterly_rankings
             
         except Exception as e:
-            print(f'❌ 조직 {org_id} 분기별 랭킹 생성 오류: {e}')
+            logger.error('❌ 조직 %s 분기별 랭킹 생성 오류: %s', org_id, e)
             return []
     
     def save_ranking_data(self, ranking_data: Dict) -> bool:
-        """랭킹 데이터를 ranking_results 컬렉션에 저장"""
+        """랭킹 데이터를 ranking_results 저장 대기열에 추가 (flush_ranking_data에서 일괄 저장)"""
         try:
             if not ranking_data:
                 return False
             
-            collection = self.mongo_db['ranking_results']
-            
             # 기존 데이터가 있으면 업데이트, 없으면 삽입
             if ranking_data['type'] == 'team-annual':
                 filter_query = {
@@ -278,57 +324,193 @@ class AnnualTeamRankingSystem:
                     'evaluated_quarter': ranking_data['evaluated_quarter']
                 }
             
-            result = collection.replace_one(filter_query, ranking_data, upsert=True)
+            self._pending_ops.append(pymongo.ReplaceOne(filter_query, ranking_data, upsert=True))
+            return True
             
-            if result.upserted_id:
-                print(f'✅ 조직 {ranking_data["organization_id"]} 랭킹 데이터 신규 저장: {result.upserted_id}')
-            else:
-                print(f'✅ 조직 {ranking_data["organization_id"]} 랭킹 데이터 업데이트 완료')
+        except Exception as e:
+            logger.error('❌ 랭킹 데이터 저장 오류: %s', e)
+            return False
+    
+    def flush_ranking_data(self) -> bool:
+        """대기 중인 랭킹 데이터를 ranking_results 컬렉션에 bulk_write로 일괄 저장"""
+        if not self._pending_ops:
+            return True
+        
+        try:
+            # 재생성 가능한 배치 결과이므로 저널 대기 없이 기록
+            collection = self.mongo_db.get_collection(
+                'ranking_results', write_concern=WriteConcern(w=1, j=False)
+            )
+            # 청크별 bulk_write를 스레드 풀에서 동시에 실행해 왕복 지연을 겹침
+            chunks = [
+                self._pending_ops[i:i + FLUSH_CHUNK_SIZE]
+                for i in range(0, len(self._pending_ops), FLUSH_CHUNK_SIZE)
+            ]
+            with ThreadPoolExecutor(max_workers=min(FLUSH_MAX_WORKERS, len(chunks))) as executor:
+                results = list(executor.map(
+                    lambda chunk: collection.bulk_write(chunk, ordered=False), chunks
+                ))
+            
+            upserted = sum(result.upserted_count for result in results)
+            modified = sum(result.modified_count for result in results)
+            logger.info('✅ 랭킹 데이터 일괄 저장 완료: 신규 %s개, 업데이트 %s개', upserted, modified)
+            return True
+            
+        except Exception as e:
+            logger.error('❌ 랭킹 데이터 일괄 저장 오류: %s', e)
+            return False
+        
+        finally:
+            self._pending_ops = []
+    
+    def sync_user_mirror(self, user_org_mapping: Dict) -> bool:
+        """MariaDB 사용자/조직 정보를 MongoDB users 컬렉션에 미러링 ($lookup용)
+        
+        스테이징 컬렉션에 전체 스냅샷을 쓴 뒤 users로 교체해, 삭제되었거나
+        조직이 해제된 사용자가 미러에 남지 않도록 MariaDB와 정확히 일치시킨다.
+        """
+        try:
+            if not user_org_mapping:
+                return False
             
+            # _id는 final_score_results.users 키와 같은 문자열 ID 사용
+            docs = [
+                {
+                    '_id': str(user_id),
+                    'user_id': user_id,
+                    'name': user_info['name'],
+                    'organization_id': user_info['organization_id'],
+                    'organization_name': user_info['organization_name']
+                }
+                for user_id, user_info in user_org_mapping.items()
+            ]
+            staging = self.mongo_db[USER_MIRROR_STAGING_COLLECTION]
+            staging.drop()
+            staging.insert_many(docs, ordered=False)
+            # 원자적 교체 (기존 users 컬렉션은 삭제)
+            staging.rename('users', dropTarget=True)
+            logger.info('✅ 사용자 미러링 완료: %s명', len(docs))
             return True
             
         except Exception as e:
-            print(f'❌ 랭킹 데이터 저장 오류: {e}')
+            logger.error('❌ 사용자 미러링 오류: %s', e)
             return False
     
-    def process_all_teams_annual_ranking(self, year: int = 2024):
-        """모든 팀의 연말 랭킹 처리"""
+    def get_team_rankings_server_side(self, year: int) -> Dict[int, List[Dict]]:
+        """조직별 정렬 랭킹을 MongoDB 집계 파이프라인에서 계산 (users 미러 필요)"""
+        try:
+            collection = self.mongo_db['final_score_results']
+            
+            def rounded(path: str) -> Dict:
+                return {'$round': [{'$ifNull': [path, 0]}, 2]}
+            
+            pipeline = [
+                {'$match': {
+                    'type': 'personal-final-score-annual',
+                    'evaluated_year': year
+                }},
+                {'$limit': 1},
+                {'$project': {'_id': 0, 'arr': {'$objectToArray': '$users'}}},
+                {'$unwind': '$arr'},
+                {'$lookup': {
+                    'from': 'users',
+                    'localField': 'arr.k',
+                    'foreignField': '_id',
+                    'as': 'u'
+                }},
+                {'$unwind': '$u'},
+                {'$project': {
+                    'organization_id': '$u.organization_id',
+                    'user_id': '$u.user_id',
+                    'member': {
+                        'name': '$u.name',
+                        'overall_final_score': rounded('$arr.v.final_score_info.overall_final_score'),
+                        'quantitative': rounded('$arr.v.final_score_info.category_averages.quantitative'),
+                        'qualitative': rounded('$arr.v.final_score_info.category_averages.qualitative'),
+                        'peer': rounded('$arr.v.final_score_info.category_averages.peer')
+                    }
+                }},
+                # 동점자는 사용자 ID 순 (Python 경로와 동일)
+                {'$sort': {'organization_id': 1, 'member.overall_final_score': -1, 'user_id': 1}},
+                {'$group': {
+                    '_id': '$organization_id',
+                    'members': {'$push': '$member'}
+                }},
+                {'$project': {
+                    'team_ranking': {'$map': {
+                        'input': {'$range': [0, {'$size': '$members'}]},
+                        'as': 'i',
+                        'in': {'$mergeObjects': [
+                            {'rank': {'$add': ['$$i', 1]}},
+                            {'$arrayElemAt': ['$members', '$$i']}
+                        ]}
+                    }}
+                }}
+            ]
+            
+            rankings = {doc['_id']: doc['team_ranking'] for doc in collection.aggregate(pipeline)}
+            logger.info('✅ %s년 서버 측 팀 랭킹 집계 완료: %s개 조직', year, len(rankings))
+            return rankings
+            
+        except Exception as e:
+            logger.error('❌ 서버 측 팀 랭킹 집계 오류: %s', e)
+            return {}
+    
+    def process_all_teams_annual_ranking(self, year: int = 2024, server_side: bool = False):
+        """모든 팀의 연말 랭킹 처리 (server_side=True면 MongoDB 집계로 랭킹 계산)"""
         try:
-            print(f"\n🚀 {year}년 모든 팀 연말 랭킹 생성 시작")
+            logger.info("🚀 %s년 모든 팀 연말 랭킹 생성 시작", year)
+            
+            # 배치 전체에서 동일한 created_at/updated_at 사용
+            self._batch_now = datetime.now()
             
             # 1. 사용자 조직 매핑 가져오기
             user_org_mapping = self.get_user_organization_mapping()
             
             # 2. 연말 최종 점수 데이터 가져오기
-            annual_scores = self.get_annual_final_scores(year)
+            if server_side:
+                annual_scores = {}
+                server_rankings = {}
+                if self.sync_user_mirror(user_org_mapping):
+                    server_rankings = self.get_team_rankings_server_side(year)
+                has_scores = bool(server_rankings)
+            else:
+                annual_scores = self.get_annual_final_scores(year)
+                has_scores = bool(annual_scores)
             
-            if not annual_scores:
-                print("❌ 연말 점수 데이터가 없습니다.")
+            if not has_scores:
+                logger.error("❌ 연말 점수 데이터가 없습니다.")
                 return
             
             # 3. 조직 목록 가져오기
-            organizations = {}
+            organizations = self.get_organizations()
+            
+            # 조직별 구성원 인덱스 (조직마다 전체 사용자 매핑을 다시 훑지 않도록)
+            users_by_org = {}
             for user_id, user_info in user_org_mapping.items():
-                org_id = user_info['organization_id']
-                org_name = user_info['organization_name']
-                if org_id not in organizations:
-                    organizations[org_id] = org_name
+                users_by_org.setdefault(user_info['organization_id'], []).append((user_id, user_info['name']))
             
-            print(f"📋 처리 대상: {len(organizations)}개 조직")
-            print(f"📋 조직 목록: {organizations}")
+            logger.info("📋 처리 대상: %s개 조직", len(organizations))
+            logger.info("📋 조직 목록: %s", organizations)
             
             total_success = 0
             total_fail = 0
             
             # 4. 각 조직별로 처리
             for org_id, org_name in organizations.items():
-                print(f"\n{'='*60}")
-                print(f"📅 조직 {org_id} ({org_name}) 처리 시작")
-                print(f"{'='*60}")
+                logger.info('=' * 60)
+                logger.info("📅 조직 %s (%s) 처리 시작", org_id, org_name)
+                logger.info('=' * 60)
+                
+                # 팀 랭킹은 한 번만 정렬해 연말/분기 문서에 공유
+                if server_side:
+                    team_ranking = server_rankings.get(org_id, [])
+                else:
+                    team_ranking = self._build_team_ranking(users_by_org.get(org_id, []), annual_scores)
                 
                 # 연말 랭킹 생성
                 annual_ranking = self.generate_team_annual_ranking(
-                    org_id, org_name, year, user_org_mapping, annual_scores
+                    org_id, org_name, year, team_ranking
                 )
                 
                 if annual_ranking and self.save_ranking_data(annual_ranking):
@@ -338,7 +520,7 @@ class AnnualTeamRankingSystem:
                 
                 # 분기별 랭킹 생성 (연말 보고서용)
                 quarterly_rankings = self.generate_quarterly_rankings_for_annual(
-                    org_id, org_name, year, user_org_mapping, annual_scores
+                    org_id, org_name, year, team_ranking
                 )
                 
                 for quarterly_ranking in quarterly_rankings:
@@ -347,80 +529,90 @@ class AnnualTeamRankingSystem:
                     else:
                         total_fail += 1
             
-            print(f"\n🎉 전체 처리 완료!")
-            print(f"✅ 총 성공: {total_success}개")
-            print(f"❌ 총 실패: {total_fail}개")
+            # 5. 전체 조직 랭킹 일괄 저장
+            if not self.flush_ranking_data():
+                total_fail += total_success
+                total_success = 0
+            
+            logger.info("🎉 전체 처리 완료!")
+            logger.info("✅ 총 성공: %s개", total_success)
+            logger.info("❌ 총 실패: %s개", total_fail)
             
         except Exception as e:
-            print(f'❌ 전체 연말 랭킹 처리 오류: {e}')
+            logger.error('❌ 전체 연말 랭킹 처리 오류: %s', e)
             raise e
     
     def show_saved_annual_results(self, year: int = 2024):
         """저장된 연말 랭킹 결과 확인"""
         try:
-            print(f"\n📊 {year}년 저장된 연말 랭킹 결과 요약")
-            print("="*60)
+            logger.info("📊 %s년 저장된 연말 랭킹 결과 요약", year)
+            logger.info('=' * 60)
             
             collection = self.mongo_db['ranking_results']
             
-            # team-annual 타입 문서 조회
-            annual_docs = list(collection.find({
-                'type': 'team-annual',
-                'evaluated_year': year
-            }))
-            
-            # team-quarter 타입 문서 조회
-            quarterly_docs = list(collection.find({
-                'type': 'team-quarter',
-                'evaluated_year': year
-            }))
-            
-            print(f"📋 연말 랭킹: {len(annual_docs)}개")
-            print(f"📋 분기별 랭킹: {len(quarterly_docs)}개")
+            # team-annual: 조직별 요약과 1위 구성원만 서버에서 추출
+            annual_docs = list(collection.aggregate([
+                {'$match': {'type': 'team-annual', 'evaluated_year': year}},
+                {'$project': {
+                    '_id': 0,
+                    'organization_id': 1,
+                    'organization_name': 1,
+                    'total_members': 1,
+                    'top': {'$arrayElemAt': ['$team_ranking', 0]}
+                }},
+                {'$sort': {'organization_id': 1}}
+            ], batchSize=SUMMARY_BATCH_SIZE, allowDiskUse=True))
+            
+            # team-quarter: 조직별 분기 목록으로 그룹화
+            quarterly_by_org = list(collection.aggregate([
+                {'$match': {'type': 'team-quarter', 'evaluated_year': year}},
+                {'$group': {
+                    '_id': '$organization_id',
+                    'org_name': {'$first': '$organization_name'},
+                    'quarters': {'$push': '$evaluated_quarter'}
+                }}
+            ], batchSize=SUMMARY_BATCH_SIZE, allowDiskUse=True))
+            
+            logger.info("📋 연말 랭킹: %s개", len(annual_docs))
+            logger.info("📋 분기별 랭킹: %s개", sum(len(doc['quarters']) for doc in quarterly_by_org))
             
             # 연말 랭킹 요약
-            print(f"\n🏆 {year}년 연말 랭킹:")
-            for doc in sorted(annual_docs, key=lambda x: x['organization_id']):
+            logger.info("🏆 %s년 연말 랭킹:", year)
+            for doc in annual_docs:
                 org_id = doc['organization_id']
                 org_name = doc['organization_name']
                 member_count = doc['total_members']
-                print(f"   조직 {org_id} ({org_name}): {member_count}명")
+                logger.info("   조직 %s (%s): %s명", org_id, org_name, member_count)
                 
                 # 1위 사용자 정보 출력
-                if doc.get('team_ranking'):
-                    top_member = doc['team_ranking'][0]
-                    print(f"     1위: {top_member['name']} ({top_member['overall_final_score']}점)")
+                top_member = doc.get('top')
+                if top_member:
+                    logger.info("     1위: %s (%s점)", top_member['name'], top_member['overall_final_score'])
             
             # 분기별 랭킹 요약
-            quarterly_by_org = {}
-            for doc in quarterly_docs:
-                org_id = doc['organization_id']
-                if org_id not in quarterly_by_org:
-                    quarterly_by_org[org_id] = []
-                quarterly_by_org[org_id].append(doc)
-            
-            print(f"\n📅 분기별 랭킹 요약:")
-            for org_id, docs in quarterly_by_org.items():
-                org_name = docs[0]['organization_name']
-                quarters = sorted([doc['evaluated_quarter'] for doc in docs])
-                print(f"   조직 {org_id} ({org_name}): {quarters} 분기")
+            logger.info("📅 분기별 랭킹 요약:")
+            for doc in quarterly_by_org:
+                quarters = sorted(doc['quarters'])
+                logger.info("   조직 %s (%s): %s 분기", doc['_id'], doc['org_name'], quarters)
                 
         except Exception as e:
-            print(f'❌ 결과 요약 확인 오류: {e}')
+            logger.error('❌ 결과 요약 확인 오류: %s', e)
     
     def disconnect_databases(self):
         """데이터베이스 연결 해제"""
         try:
             if self.maria_connection:
                 self.maria_connection.close()
-                print('✅ MariaDB 연결 해제')
+                self.maria_connection = None
+                logger.info('✅ MariaDB 연결 해제')
             if self.mongo_client:
                 self.mongo_client.close()
-                print('✅ MongoDB 연결 해제')
+                logger.info('✅ MongoDB 연결 해제')
         except Exception as e:
-            print(f'❌ 데이터베이스 연결 해제 오류: {e}')
+            logger.error('❌ 데이터베이스 연결 해제 오류: %s', e)
 
 def main():
+    log_listener = setup_logging()
     system = AnnualTeamRankingSystem()
     
     try:
@@ -433,11 +625,10 @@ def main():
         system.show_saved_annual_results(2024)
         
     except Exception as e:
-        print(f'❌ 메인 처리 오류: {e}')
-        import traceback
-        traceback.print_exc()
+        logger.exception('❌ 메인 처리 오류: %s', e)
     finally:
         system.disconnect_databases()
+        log_listener.stop()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,43 +1,131 @@
 import os
 import asyncio
+import json
 import math
+import logging
+import sys
+from pathlib import Path
+from collections import defaultdict
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Union
-import pymongo
-import pymysql
-from openai import OpenAI
+import httpx
+from pymongo import AsyncMongoClient, UpdateOne
+import aiomysql
+from aiolimiter import AsyncLimiter
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
+# 공용 모듈(app/common) 임포트 경로 추가
+_APP_DIR = str(Path(__file__).resolve().parents[2])
+if _APP_DIR not in sys.path:
+    sys.path.append(_APP_DIR)
+from common.logging_setup import setup_logging
+
 # 환경 변수 로드
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# 동시에 처리할 조직 수 (OpenAI 호출 한도 고려)
+ORG_CONCURRENCY = 4
+
+# 동시에 처리할 연도 수
+YEAR_CONCURRENCY = 2
+
+# OpenAI 분당 요청 한도 (토큰 버킷)
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv('OPENAI_RPM', '60'))
+
+# OpenAI Batch API 작업 상태 확인 주기 (초)
+BATCH_POLL_INTERVAL_SECONDS = 60
+
+# 프롬프트에 포함할 성과자 그룹별 최대 코멘트 수와 코멘트당 최대 글자 수
+MAX_PROMPT_COMMENTS = 15
+MAX_COMMENT_LENGTH = 400
+
+# 조직별 연말 관리 전략 생성 시스템 프롬프트 (조직 간 동일한 접두 메시지로 OpenAI 프롬프트 캐싱 적용)
+SYSTEM_PROMPT = '당신은 조직 관리 및 인사 전문가입니다. 연말 성과 분석 결과를 바탕으로 해당 조직에 특화된 내년도 실무적이고 구체적인 관리 전략을 제시해주세요. 일반론보다는 제시된 데이터의 특성을 반영한 맞춤형 솔루션을 제공하는 것이 중요합니다. 응답은 반드시 연속된 자연스러운 문단들로만 구성해야 하며, 어떠한 번호(1,2,3), 기호(-, *, •), 마크다운 문법(#, **, *, `)도 사용하지 마세요. 목록이나 구조화된 형태가 아닌 일반적인 텍스트 문서처럼 작성해주세요.'
+MESSAGES_TEMPLATE = [{'role': 'system', 'content': SYSTEM_PROMPT}]
+
+# 조직별 연말 관리 전략 생성 프롬프트 템플릿
+PROMPT_TMPL = """
+{org_name} 조직의 연말 성과 평가 분석 결과입니다.
+
+상위 20% 성과자 ({top_count}명)
+평균 점수: {top_avg_score:.1f}점
+연말 최종 코멘트들:
+{top_block}
+
+하위 20% 성과자 ({bottom_count}명)
+평균 점수: {bottom_avg_score:.1f}점
+연말 최종 코멘트들:
+{bottom_block}
+
+위의 연말 성과 분석 결과를 바탕으로 {org_name} 조직에 특화된 내년도 관리 전략을 작성해주세요.
+
+상위 성과자 관리 전략부터 시작해서 강점 유지 및 확산 방안, 동기부여 및 성장 지원 방법, 멘토링 역할 활용 방안을 설명하고, 이어서 하위 성과자 개선 전략으로 핵심 개선 포인트 및 원인 분석, 구체적인 역량 개발 계획, 단계별 성과 향상 로드맵을 제시하며, 마지막으로 조직 전체 발전 방향으로 조직 내 성과 격차 해소 방안, 협업 및 지식 공유 활성화, 장기적 조직 역량 강화 전략을 다뤄주세요.
+
+중요: 응답에서 절대 사용하지 말아야 할 것들:
+- 숫자 목록 (1., 2., 3., 4. 등)
+- 알파벳 목록 (a., b., c. 등)  
+- 불릿 포인트 (-, *, •, ◦ 등)
+- 마크다운 문법 (#, ##, **, *, `, 등)
+- 기호나 특수문자를 이용한 구분
+- 목록 형태의 구조화
+
+대신 자연스러운 문단 형태로 작성하되, 각 주제 영역 사이에는 적절한 문단 구분을 두어 가독성을 높여주세요. 모든 내용은 연속된 문장들로 구성된 일반적인 텍스트 형태로만 작성해주세요.
+"""
+
 class TeamAnnualEvaluationSystem:
     def __init__(self):
-        self.maria_connection = None
+        self.maria_pool = None
         self.mongo_client = None
         self.mongo_db = None
-        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self._user_org_mapping = None
+        self.http_client = None
+        self.openai_client = None
+        self.create_openai_client()
+        self.rate_limiter = AsyncLimiter(max_rate=OPENAI_REQUESTS_PER_MINUTE, time_period=60)
+    
+    def create_openai_client(self):
+        """keep-alive HTTP/2 커넥션 풀을 공유하는 OpenAI 클라이언트 생성 (동시 조직 호출 간 TLS 연결 재사용)"""
+        self.http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=32),
+            timeout=60
+        )
+        self.openai_client = AsyncOpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            max_retries=2,
+            http_client=self.http_client
+        )
         
     async def connect_databases(self):
         """데이터베이스 연결"""
         try:
-            # MariaDB 연결
-            self.maria_connection = pymysql.connect(
+            # 이전 disconnect_databases에서 닫힌 OpenAI HTTP 커넥션 풀 재생성
+            if self.http_client.is_closed:
+                self.create_openai_client()
+            
+            # MariaDB 커넥션 풀 생성
+            self.maria_pool = await aiomysql.create_pool(
                 host=os.getenv('DB_HOST'),
                 port=int(os.getenv('DB_PORT')),
                 user=os.getenv('DB_USER'),
                 password=os.getenv('DB_PASSWORD'),
-                database=os.getenv('DB_NAME'),
-                charset='utf8mb4'
+                db=os.getenv('DB_NAME'),
+                charset='utf8mb4',
+                minsize=5,
+                maxsize=20,
+                autocommit=True
             )
-            print('✅ MariaDB 연결 성공')
+            logger.info('✅ MariaDB 연결 성공')
             
             # MongoDB 연결 (인증 옵션 추가)
             mongo_url = f"mongodb://{os.getenv('MONGO_USER')}:{os.getenv('MONGO_PASSWORD')}@{os.getenv('MONGO_HOST')}:{os.getenv('MONGO_PORT')}/{os.getenv('MONGO_DB_NAME')}?authSource=admin"
             
-            print(f"🔍 MongoDB 연결 시도: {mongo_url.replace(os.getenv('MONGO_PASSWORD'), '***')}")
+            logger.info('🔍 MongoDB 연결 시도: %s', mongo_url.replace(os.getenv('MONGO_PASSWORD'), '***'))
             
-            self.mongo_client = pymongo.MongoClient(
+            self.mongo_client = AsyncMongoClient(
                 mongo_url,
                 serverSelectionTimeoutMS=5000,  # 5초 타임아웃
                 connectTimeoutMS=5000,
@@ -45,29 +133,43 @@ class TeamAnnualEvaluationSystem:
             )
             
             # 연결 테스트
-            self.mongo_client.admin.command('ping')
+            await self.mongo_client.admin.command('ping')
             self.mongo_db = self.mongo_client[os.getenv('MONGO_DB_NAME')]
-            print('✅ MongoDB 연결 성공')
+            logger.info('✅ MongoDB 연결 성공')
             
         except Exception as e:
-            print(f'❌ 데이터베이스 연결 오류: {e}')
+            logger.error('❌ 데이터베이스 연결 오류: %s', e)
             
             # MongoDB 연결 대안 시도
             try:
-                print("🔄 MongoDB 인증 없이 연결 시도...")
+                logger.info('🔄 MongoDB 인증 없이 연결 시도...')
                 mongo_url_no_auth = f"mongodb://{os.getenv('MONGO_HOST')}:{os.getenv('MONGO_PORT')}/{os.getenv('MONGO_DB_NAME')}"
-                self.mongo_client = pymongo.MongoClient(mongo_url_no_auth)
-                self.mongo_client.admin.command('ping')
+                self.mongo_client = AsyncMongoClient(mongo_url_no_auth)
+                await self.mongo_client.admin.command('ping')
                 self.mongo_db = self.mongo_client[os.getenv('MONGO_DB_NAME')]
-                print('✅ MongoDB 연결 성공 (인증 없음)')
+                logger.info('✅ MongoDB 연결 성공 (인증 없음)')
             except Exception as e2:
-                print(f'❌ MongoDB 인증 없는 연결도 실패: {e2}')
+                logger.error('❌ MongoDB 인증 없는 연결도 실패: %s', e2)
                 raise e
+        
+        await self.ensure_indexes()
+    
+    async def ensure_indexes(self):
+        """조회/업서트 필터용 MongoDB 인덱스 생성"""
+        await self.mongo_db['reports'].create_index(
+            [('type', 1), ('evaluated_year', 1), ('user.userId', 1)]
+        )
+        # 연말 문서만 대상 (분기 문서는 organization_id 대신 division_id 사용)
+        await self.mongo_db['team_strategic_observations'].create_index(
+            [('organization_id', 1), ('evaluated_year', 1)],
+            unique=True,
+            partialFilterExpression={'organization_id': {'$exists': True}}
+        )
     
-    def get_organization_names(self) -> Dict[int, str]:
+    async def get_organization_names(self) -> Dict[int, str]:
         """organizations 테이블에서 division_id와 name 매핑 조회"""
         try:
-            with self.maria_connection.cursor(pymysql.cursors.DictCursor) as cursor:
+            async with self.maria_pool.acquire() as conn, conn.cursor(aiomysql.DictCursor) as cursor:
                 query = """
                     SELECT division_id, name
                     FROM organizations
@@ -75,8 +177,8 @@ class TeamAnnualEvaluationSystem:
                     GROUP BY division_id, name
                     ORDER BY division_id
                 """
-                cursor.execute(query)
-                rows = cursor.fetchall()
+                await cursor.execute(query)
+                rows = await cursor.fetchall()
                 
             # division_id -> name 매핑 딕셔너리 생성
             org_name_mapping = {}
@@ -85,39 +187,44 @@ class TeamAnnualEvaluationSystem:
                 org_name = row['name']
                 org_name_mapping[division_id] = org_name
             
-            print(f'🏢 조직 이름 매핑 조회 완료: {len(org_name_mapping)}개')
+            logger.info('🏢 조직 이름 매핑 조회 완료: %s개', len(org_name_mapping))
             for div_id, name in org_name_mapping.items():
-                print(f"   조직 {div_id}: {name}")
+                logger.debug('조직 %s: %s', div_id, name)
             
             return org_name_mapping
             
         except Exception as e:
-            print(f'❌ 조직 이름 매핑 조회 오류: {e}')
+            logger.error('❌ 조직 이름 매핑 조회 오류: %s', e)
             return {}
     
-    def disconnect_databases(self):
+    async def disconnect_databases(self):
         """데이터베이스 연결 해제"""
+        self._user_org_mapping = None
         try:
-            if self.maria_connection:
-                self.maria_connection.close()
-                print('✅ MariaDB 연결 해제')
+            if self.maria_pool:
+                self.maria_pool.close()
+                await self.maria_pool.wait_closed()
+                self.maria_pool = None
+                logger.info('✅ MariaDB 연결 해제')
             if self.mongo_client:
-                self.mongo_client.close()
-                print('✅ MongoDB 연결 해제')
+                await self.mongo_client.close()
+                logger.info('✅ MongoDB 연결 해제')
+            if not self.http_client.is_closed:
+                await self.http_client.aclose()
         except Exception as e:
-            print(f'❌ 데이터베이스 연결 해제 오류: {e}')
+            logger.error('❌ 데이터베이스 연결 해제 오류: %s', e)
     
-    def get_available_years(self) -> List[int]:
+    async def get_available_years(self) -> List[int]:
         """처리 가능한 모든 연도 조회 (personal-annual 타입 기준)"""
         try:
             reports_collection = self.mongo_db['reports']
             
             # personal-annual 타입 확인
-            annual_count = reports_collection.count_documents({"type": "personal-annual"})
-            print(f"📋 personal-annual 문서 수: {annual_count}")
+            annual_count = await reports_collection.count_documents({"type": "personal-annual"})
+            logger.info('📋 personal-annual 문서 수: %s', annual_count)
             
             if annual_count == 0:
-                print("❌ personal-annual 타입 문서가 없습니다.")
+                logger.warning('❌ personal-annual 타입 문서가 없습니다.')
                 return []
             
             # 실제 쿼리 (organization_id 조건 제거)
@@ -129,42 +236,46 @@ class TeamAnnualEvaluationSystem:
                 {"$sort": {"_id": 1}}
             ]
             
-            years = list(reports_collection.aggregate(pipeline))
+            years = await (await reports_collection.aggregate(pipeline)).to_list(length=None)
             year_list = [y['_id'] for y in years if y['_id'] is not None]
             
-            print(f"📅 처리 가능한 연도: {year_list}")
+            logger.info('📅 처리 가능한 연도: %s', year_list)
             return year_list
             
         except Exception as e:
-            print(f'❌ 연도 데이터 조회 오류: {e}')
+            logger.error('❌ 연도 데이터 조회 오류: %s', e)
             return []
     
-    def get_user_organization_mapping(self) -> Dict[int, int]:
-        """사용자 ID별 조직 ID 매핑"""
+    async def get_user_organization_mapping(self) -> Dict[int, int]:
+        """사용자 ID별 조직 ID 매핑 (연결 동안 캐시)"""
+        if self._user_org_mapping is not None:
+            return self._user_org_mapping
+        
         try:
-            with self.maria_connection.cursor(pymysql.cursors.DictCursor) as cursor:
+            async with self.maria_pool.acquire() as conn, conn.cursor(aiomysql.DictCursor) as cursor:
                 query = """
                     SELECT id, organization_id
                     FROM users 
                     WHERE organization_id IS NOT NULL
                 """
-                cursor.execute(query)
-                users = cursor.fetchall()
+                await cursor.execute(query)
+                users = await cursor.fetchall()
             
             user_org_mapping = {user['id']: user['organization_id'] for user in users}
-            print(f'👥 사용자-조직 매핑 완료: {len(user_org_mapping)}명')
+            logger.info('👥 사용자-조직 매핑 완료: %s명', len(user_org_mapping))
+            self._user_org_mapping = user_org_mapping
             return user_org_mapping
             
         except Exception as e:
-            print(f'❌ 사용자-조직 매핑 오류: {e}')
+            logger.error('❌ 사용자-조직 매핑 오류: %s', e)
             return {}
 
-    def get_reports_by_organization(self, evaluated_year: int) -> Dict[str, List[Dict]]:
-        """organization_id별로 personal-annual 보고서 조회 (사용자 매핑 활용)"""
+    async def get_division_performance_by_organization(self, evaluated_year: int) -> Dict[str, Dict]:
+        """organization_id별 personal-annual 보고서의 상위/하위 20% 및 평균 점수를 MongoDB에서 집계 (사용자 매핑 활용)"""
         try:
             reports_collection = self.mongo_db['reports']
             
-            print(f"🔍 {evaluated_year}년 MongoDB reports 컬렉션 연말 데이터 조회...")
+            logger.info('🔍 %s년 MongoDB reports 컬렉션 연말 데이터 조회...', evaluated_year)
             
             # personal-annual 타입으로 변경 (organization_id 조건 제거)
             query = {
@@ -173,384 +284,450 @@ class TeamAnnualEvaluationSystem:
                 'user.userId': {'$exists': True, '$ne': None}  # userId가 있는 문서만
             }
             
-            print(f"🎯 쿼리: {query}")
-            reports = list(reports_collection.find(query))
-            
-            print(f'📋 {len(reports)}개의 개인 연말 보고서 조회 완료')
-            
-            if len(reports) == 0:
-                print(f"❌ {evaluated_year}년 연말 데이터가 없습니다.")
-                return {}
+            logger.debug('🎯 쿼리: %s', query)
             
             # 사용자-조직 매핑 가져오기
-            user_org_mapping = self.get_user_organization_mapping()
+            user_org_mapping = await self.get_user_organization_mapping()
             
-            # userId를 통해 organization_id별로 그룹화
-            org_reports = {}
+            # 서버에서는 저장 문서에 들어가는 필드만 평탄화해 finalScore 내림차순으로 정렬하고,
+            # userId → organization_id 매핑은 Python dict 조회로 처리 (매핑을 파이프라인 리터럴로 보내지 않음)
+            pipeline = [
+                {'$match': query},
+                {'$project': {
+                    '_id': 0,
+                    'user_id': '$user.userId',
+                    'user_name': {'$ifNull': ['$user.name', None]},
+                    'finalScore': {'$ifNull': ['$finalScore', 0]},
+                    'finalComment': {'$ifNull': ['$finalComment', '']}
+                }},
+                {'$sort': {'finalScore': -1}}
+            ]
+            reports_by_org = defaultdict(list)
+            total_reports = 0
             users_without_org = 0
             
-            for report in reports:
-                user_id = report.get('user', {}).get('userId')
-                if user_id and user_id in user_org_mapping:
-                    org_id = str(user_org_mapping[user_id])
-                    if org_id not in org_reports:
-                        org_reports[org_id] = []
-                    org_reports[org_id].append(report)
-                else:
+            # 정렬된 보고서를 커서 배치 단위로 받아가며 조직별로 분류 (정렬 순서 유지)
+            cursor = await reports_collection.aggregate(pipeline, batchSize=500, allowDiskUse=True)
+            async for report in cursor:
+                total_reports += 1
+                org_id = user_org_mapping.get(report['user_id'])
+                if org_id is None:
                     users_without_org += 1
+                    continue
+                reports_by_org[org_id].append(report)
+            
+            # 조직별 finalScore 기준 상위/하위 20% (조직 인원의 20% 올림) 선택과 평균 계산
+            org_performance = {}
+            for org_id in sorted(reports_by_org):
+                reports = reports_by_org[org_id]
+                split_count = math.ceil(len(reports) * 0.2)
+                top_performers = reports[:split_count]
+                bottom_performers = reports[-split_count:]
+                
+                org_performance[str(org_id)] = {
+                    'total_members': len(reports),
+                    'top_performers': top_performers,
+                    'bottom_performers': bottom_performers,
+                    'top_avg_score': sum(report['finalScore'] for report in top_performers) / split_count,
+                    'bottom_avg_score': sum(report['finalScore'] for report in bottom_performers) / split_count
+                }
+                
+                # 조직별 보고서 수 출력
+                logger.debug('🔢 조직 %s: %s개 연말 보고서', org_id, len(reports))
+                first_report = top_performers[0]
+                logger.debug('예시 - %s: %s점', first_report.get('user_name') or 'Unknown', first_report['finalScore'])
             
-            print(f'🏢 총 {len(org_reports)}개 조직 발견')
-            if users_without_org > 0:
-                print(f'⚠️ 조직 정보가 없는 사용자: {users_without_org}명')
+            logger.info('📋 %s개의 개인 연말 보고서 조회 완료', total_reports)
             
-            # 각 조직별 보고서 수 출력
-            for org_id, reports_list in org_reports.items():
-                print(f"🔢 조직 {org_id}: {len(reports_list)}개 연말 보고서")
-                if reports_list:
-                    first_report = reports_list[0]
-                    user_name = first_report.get('user', {}).get('name', 'Unknown')
-                    final_score = first_report.get('finalScore', 0)
-                    print(f"   예시 - {user_name}: {final_score}점")
+            if total_reports == 0:
+                logger.warning('❌ %s년 연말 데이터가 없습니다.', evaluated_year)
+                return {}
+            
+            logger.info('🏢 총 %s개 조직 발견', len(org_performance))
+            if users_without_org > 0:
+                logger.warning('⚠️ 조직 정보가 없는 사용자: %s명', users_without_org)
             
-            return org_reports
+            return org_performance
             
         except Exception as e:
-            print(f'❌ 조직별 연말 보고서 조회 오류: {e}')
+            logger.error('❌ 조직별 연말 보고서 조회 오류: %s', e)
             raise e
     
-    def classify_division_performance(self, reports: List[Dict]) -> Tuple[List[Dict], List[Dict], int]:
-        """조직 내에서 개인별 finalScore 기준 상위/하위 20% 분류"""
-        if not reports:
-            return [], [], 0
+    def build_division_strategy_request(self, top_performers: List[Dict], bottom_performers: List[Dict], org_name: str) -> Dict:
+        """조직별 연말 관리 전략 생성용 chat.completions 요청 본문 생성 (실시간/Batch API 공용)"""
+        # 상위 성과자들의 finalComment 수집 (점수 높은 순 최대 MAX_PROMPT_COMMENTS개)
+        top_comments = [
+            report['finalComment'][:MAX_COMMENT_LENGTH]
+            for report in top_performers 
+            if report['finalComment'].strip()
+        ][:MAX_PROMPT_COMMENTS]
         
-        # finalScore 기준으로 내림차순 정렬 (높은 점수가 상위)
-        sorted_reports = sorted(reports, key=lambda x: x.get('finalScore', 0), reverse=True)
+        # 하위 성과자들의 finalComment 수집 (점수 낮은 순 최대 MAX_PROMPT_COMMENTS개)
+        bottom_comments = [
+            report['finalComment'][:MAX_COMMENT_LENGTH]
+            for report in bottom_performers 
+            if report['finalComment'].strip()
+        ][-MAX_PROMPT_COMMENTS:]
         
-        total_count = len(sorted_reports)
-        top_20_percent_count = math.ceil(total_count * 0.2)
-        bottom_20_percent_count = math.ceil(total_count * 0.2)
+        # 점수 정보
+        top_scores = [p['finalScore'] for p in top_performers]
+        bottom_scores = [p['finalScore'] for p in bottom_performers]
         
-        # 상위 20% (점수가 높은 순)
-        top_performers = sorted_reports[:top_20_percent_count]
+        top_avg_score = sum(top_scores) / len(top_scores) if top_scores else 0
+        bottom_avg_score = sum(bottom_scores) / len(bottom_scores) if bottom_scores else 0
         
-        # 하위 20% (점수가 낮은 순)
-        bottom_performers = sorted_reports[-bottom_20_percent_count:]
+        prompt = PROMPT_TMPL.format_map({
+            'org_name': org_name,
+            'top_count': len(top_performers),
+            'top_avg_score': top_avg_score,
+            'top_block': '\n'.join(f'{i}. {comment}' for i, comment in enumerate(top_comments, 1)),
+            'bottom_count': len(bottom_performers),
+            'bottom_avg_score': bottom_avg_score,
+            'bottom_block': '\n'.join(f'{i}. {comment}' for i, comment in enumerate(bottom_comments, 1))
+        })
         
-        print(f'🎯 총 {total_count}명 중 상위 {top_20_percent_count}명, 하위 {bottom_20_percent_count}명 분류 완료')
-        
-        return top_performers, bottom_performers, total_count
+        return {
+            'model': 'gpt-4o',
+            'messages': MESSAGES_TEMPLATE + [{'role': 'user', 'content': prompt}],
+            'temperature': 0.7,
+            'max_tokens': 2500
+        }
     
     async def generate_division_management_strategy(self, top_performers: List[Dict], bottom_performers: List[Dict], org_name: str) -> str:
         """GPT-4o를 사용한 조직별 맞춤 관리 방향 생성 (연말 기준)"""
         try:
-            # 상위 성과자들의 finalComment 수집
-            top_comments = [
-                report.get('finalComment', '') 
-                for report in top_performers 
-                if report.get('finalComment', '').strip()
-            ]
-            
-            # 하위 성과자들의 finalComment 수집
-            bottom_comments = [
-                report.get('finalComment', '') 
-                for report in bottom_performers 
-                if report.get('finalComment', '').strip()
-            ]
-            
-            # 점수 정보
-            top_scores = [p.get('finalScore', 0) for p in top_performers]
-            bottom_scores = [p.get('finalScore', 0) for p in bottom_performers]
+            request_body = self.build_division_strategy_request(top_performers, bottom_performers, org_name)
             
-            top_avg_score = sum(top_scores) / len(top_scores) if top_scores else 0
-            bottom_avg_score = sum(bottom_scores) / len(bottom_scores) if bottom_scores else 0
-            
-            prompt = f"""
-{org_name} 조직의 연말 성과 평가 분석 결과입니다.
-
-상위 20% 성과자 ({len(top_performers)}명)
-평균 점수: {top_avg_score:.1f}점
-연말 최종 코멘트들:
-{chr(10).join([f'{i+1}. {comment}' for i, comment in enumerate(top_comments)])}
-
-하위 20% 성과자 ({len(bottom_performers)}명)
-평균 점수: {bottom_avg_score:.1f}점
-연말 최종 코멘트들:
-{chr(10).join([f'{i+1}. {comment}' for i, comment in enumerate(bottom_comments)])}
-
-위의 연말 성과 분석 결과를 바탕으로 {org_name} 조직에 특화된 내년도 관리 전략을 작성해주세요.
-
-상위 성과자 관리 전략부터 시작해서 강점 유지 및 확산 방안, 동기부여 및 성장 지원 방법, 멘토링 역할 활용 방안을 설명하고, 이어서 하위 성과자 개선 전략으로 핵심 개선 포인트 및 원인 분석, 구체적인 역량 개발 계획, 단계별 성과 향상 로드맵을 제시하며, 마지막으로 조직 전체 발전 방향으로 조직 내 성과 격차 해소 방안, 협업 및 지식 공유 활성화, 장기적 조직 역량 강화 전략을 다뤄주세요.
-
-중요: 응답에서 절대 사용하지 말아야 할 것들:
-- 숫자 목록 (1., 2., 3., 4. 등)
-- 알파벳 목록 (a., b., c. 등)  
-- 불릿 포인트 (-, *, •, ◦ 등)
-- 마크다운 문법 (#, ##, **, *, `, 등)
-- 기호나 특수문자를 이용한 구분
-- 목록 형태의 구조화
-
-대신 자연스러운 문단 형태로 작성하되, 각 주제 영역 사이에는 적절한 문단 구분을 두어 가독성을 높여주세요. 모든 내용은 연속된 문장들로 구성된 일반적인 텍스트 형태로만 작성해주세요.
-            """
+            logger.info('🤖 %s 조직 연말 관리 전략 생성 중...', org_name)
             
-            print(f'🤖 {org_name} 조직 연말 관리 전략 생성 중...')
-            
-            response = self.openai_client.chat.completions.create(
-                model='gpt-4o',
-                messages=[
-                    {
-                        'role': 'system',
-                        'content': '당신은 조직 관리 및 인사 전문가입니다. 연말 성과 분석 결과를 바탕으로 해당 조직에 특화된 내년도 실무적이고 구체적인 관리 전략을 제시해주세요. 일반론보다는 제시된 데이터의 특성을 반영한 맞춤형 솔루션을 제공하는 것이 중요합니다. 응답은 반드시 연속된 자연스러운 문단들로만 구성해야 하며, 어떠한 번호(1,2,3), 기호(-, *, •), 마크다운 문법(#, **, *, `)도 사용하지 마세요. 목록이나 구조화된 형태가 아닌 일반적인 텍스트 문서처럼 작성해주세요.'
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=2500
-            )
+            async with self.rate_limiter:
+                response = await self.openai_client.chat.completions.create(**request_body)
             
             management_strategy = response.choices[0].message.content
-            print(f'✅ {org_name} 조직 연말 관리 전략 생성 완료')
+            logger.info('✅ %s 조직 연말 관리 전략 생성 완료 (프롬프트 토큰: %s)', org_name, response.usage.prompt_tokens)
             
             return management_strategy
             
         except Exception as e:
-            print(f'❌ {org_name} 조직 GPT 응답 생성 오류: {e}')
+            logger.error('❌ %s 조직 GPT 응답 생성 오류: %s', org_name, e)
             raise e
     
-    def save_division_strategic_observation(self, data: Dict) -> bool:
-        """조직별 연말 전략적 관찰 결과 MongoDB에 저장"""
+    def build_division_strategic_observation(self, data: Dict) -> Dict:
+        """조직별 연말 전략적 관찰 결과 저장 문서 생성"""
+        return {
+            'organization_id': data['organization_id'],  # division_id → organization_id 변경
+            'organization_name': data['organization_name'],
+            'evaluated_year': data['evaluated_year'],
+            'analysis_summary': {
+                'total_members': data['total_members'],
+                'top_performers_count': data['top_performers_count'],
+                'bottom_performers_count': data['bottom_performers_count'],
+                'top_performers_avg_score': data['top_avg_score'],
+                'bottom_performers_avg_score': data['bottom_avg_score']
+            },
+            'top_performers': data['top_performers'],
+            'bottom_performers': data['bottom_performers'],
+            'management_strategy': data['management_strategy']
+        }
+    
+    async def save_division_strategic_observations(self, documents: List[Dict]) -> bool:
+        """조직별 연말 전략적 관찰 결과를 MongoDB에 bulk_write로 일괄 저장"""
+        if not documents:
+            return True
+        
         try:
             collection = self.mongo_db['team_strategic_observations']
             
-            document = {
-                'organization_id': data['organization_id'],  # division_id → organization_id 변경
-                'organization_name': data['organization_name'],
-                'evaluated_year': data['evaluated_year'],
-                'analysis_summary': {
-                    'total_members': data['total_members'],
-                    'top_performers_count': data['top_performers_count'],
-                    'bottom_performers_count': data['bottom_performers_count'],
-                    'top_performers_avg_score': data['top_avg_score'],
-                    'bottom_performers_avg_score': data['bottom_avg_score']
-                },
-                'top_performers': [
+            now = datetime.now()
+            
+            # 기존 데이터가 있으면 업데이트(created_at 유지), 없으면 삽입
+            operations = [
+                UpdateOne(
                     {
-                        'user_id': p.get('user', {}).get('userId'),
-                        'user_name': p.get('user', {}).get('name'),
-                        'finalScore': p.get('finalScore', 0),
-                        'finalComment': p.get('finalComment', '')
-                    } for p in data['top_performers']
-                ],
-                'bottom_performers': [
+                        'organization_id': document['organization_id'],
+                        'evaluated_year': document['evaluated_year']
+                    },
                     {
-                        'user_id': p.get('user', {}).get('userId'),
-                        'user_name': p.get('user', {}).get('name'),
-                        'finalScore': p.get('finalScore', 0),
-                        'finalComment': p.get('finalComment', '')
-                    } for p in data['bottom_performers']
-                ],
-                'management_strategy': data['management_strategy'],
-                'created_at': datetime.now(),
-                'updated_at': datetime.now()
-            }
-            
-            # 기존 데이터가 있으면 업데이트, 없으면 삽입
-            filter_query = {
-                'organization_id': data['organization_id'],
-                'evaluated_year': data['evaluated_year']
-            }
-            
-            result = collection.replace_one(filter_query, document, upsert=True)
-            
-            if result.upserted_id:
-                print(f'✅ 조직 {data["organization_id"]} 연말 전략적 관찰 결과 신규 저장: {result.upserted_id}')
-            else:
-                print(f'✅ 조직 {data["organization_id"]} 연말 전략적 관찰 결과 업데이트 완료')
+                        '$set': {**document, 'updated_at': now},
+                        '$setOnInsert': {'created_at': now}
+                    },
+                    upsert=True
+                )
+                for document in documents
+            ]
             
+            result = await collection.bulk_write(operations, ordered=False)
+            logger.info('✅ 연말 전략적 관찰 결과 일괄 저장 완료: 신규 %s개, 업데이트 %s개', result.upserted_count, result.modified_count)
             return True
             
         except Exception as e:
-            print(f'❌ 조직 {data["organization_id"]} 연말 전략적 관찰 결과 저장 오류: {e}')
+            logger.error('❌ 연말 전략적 관찰 결과 일괄 저장 오류: %s', e)
             return False
     
-    async def process_organization_annual_evaluation(self, org_id: str, org_name: str, reports: List[Dict], evaluated_year: int) -> bool:
-        """특정 조직의 연말 평가 처리"""
+    def prepare_organization_annual_evaluation(self, org_id: str, org_name: str, performance: Dict, evaluated_year: int) -> Optional[Dict]:
+        """특정 조직의 상위/하위 20% 집계 결과를 저장 데이터로 변환 (management_strategy 제외)"""
+        total_count = performance['total_members']
+        logger.info('🔄 %s 조직 연말 처리 시작 (%s개 보고서)', org_name, total_count)
+        
+        if not total_count:
+            logger.warning('⚠️ %s 조직: %s년 연말 보고서가 없습니다.', org_name, evaluated_year)
+            return None
+        
+        # 1. 조직 내 finalScore 기준 상위/하위 20% 분류와 평균 점수는 MongoDB 집계 결과 사용
+        top_performers = performance['top_performers']
+        bottom_performers = performance['bottom_performers']
+        top_avg_score = performance['top_avg_score']
+        bottom_avg_score = performance['bottom_avg_score']
+        
+        logger.info('📊 %s 조직 연말 분석 결과:', org_name)
+        logger.info('- 상위 20%%: %s명 (평균 %.1f점)', len(top_performers), top_avg_score)
+        logger.info('- 하위 20%%: %s명 (평균 %.1f점)', len(bottom_performers), bottom_avg_score)
+        
+        return {
+            'organization_id': org_id,
+            'organization_name': org_name,
+            'evaluated_year': evaluated_year,
+            'total_members': total_count,
+            'top_performers_count': len(top_performers),
+            'bottom_performers_count': len(bottom_performers),
+            'top_avg_score': top_avg_score,
+            'bottom_avg_score': bottom_avg_score,
+            'top_performers': top_performers,
+            'bottom_performers': bottom_performers
+        }
+    
+    async def process_organization_annual_evaluation(self, org_id: str, org_name: str, performance: Dict, evaluated_year: int) -> Optional[Dict]:
+        """특정 조직의 연말 평가 처리 (저장할 문서 반환, 실패 시 None)"""
         try:
-            print(f'\n🔄 {org_name} 조직 연말 처리 시작 ({len(reports)}개 보고서)')
-            
-            if not reports:
-                print(f'⚠️ {org_name} 조직: {evaluated_year}년 연말 보고서가 없습니다.')
-                return False
-            
-            # 1. 조직 내에서 개인별 finalScore 기준으로 상위/하위 20% 분류
-            top_performers, bottom_performers, total_count = self.classify_division_performance(reports)
-            
-            # 평균 점수 계산
-            top_avg_score = sum(p.get('finalScore', 0) for p in top_performers) / len(top_performers) if top_performers else 0
-            bottom_avg_score = sum(p.get('finalScore', 0) for p in bottom_performers) / len(bottom_performers) if bottom_performers else 0
-            
-            print(f'📊 {org_name} 조직 연말 분석 결과:')
-            print(f'   - 상위 20%: {len(top_performers)}명 (평균 {top_avg_score:.1f}점)')
-            print(f'   - 하위 20%: {len(bottom_performers)}명 (평균 {bottom_avg_score:.1f}점)')
+            data = self.prepare_organization_annual_evaluation(org_id, org_name, performance, evaluated_year)
+            if not data:
+                return None
             
             # 2. GPT를 통한 조직별 맞춤 관리 전략 생성
-            management_strategy = await self.generate_division_management_strategy(
-                top_performers, 
-                bottom_performers, 
+            data['management_strategy'] = await self.generate_division_management_strategy(
+                data['top_performers'], 
+                data['bottom_performers'], 
                 org_name
             )
             
-            # 3. 결과를 MongoDB에 저장
-            save_result = self.save_division_strategic_observation({
-                'organization_id': org_id,
-                'organization_name': org_name,
-                'evaluated_year': evaluated_year,
-                'total_members': total_count,
-                'top_performers_count': len(top_performers),
-                'bottom_performers_count': len(bottom_performers),
-                'top_avg_score': top_avg_score,
-                'bottom_avg_score': bottom_avg_score,
-                'top_performers': top_performers,
-                'bottom_performers': bottom_performers,
-                'management_strategy': management_strategy
-            })
-            
-            if save_result:
-                print(f'✅ {org_name} 조직 연말 처리 완료')
-                return True
-            else:
-                print(f'❌ {org_name} 조직 연말 저장 실패')
-                return False
+            # 3. 저장 문서 생성 (MongoDB 저장은 연도 단위로 일괄 처리)
+            document = self.build_division_strategic_observation(data)
+            
+            logger.info('✅ %s 조직 연말 처리 완료', org_name)
+            return document
             
         except Exception as e:
-            print(f'❌ {org_name} 조직 연말 처리 오류: {e}')
-            import traceback
-            traceback.print_exc()
-            return False
+            logger.exception('❌ %s 조직 연말 처리 오류: %s', org_name, e)
+            return None
+    
+    async def generate_strategies_with_batch_api(self, prepared: List[Dict]) -> Dict[str, str]:
+        """OpenAI Batch API로 여러 조직/연도의 관리 전략을 한 번에 생성 ('조직ID:연도' → 전략)"""
+        lines = [
+            json.dumps({
+                'custom_id': f"{data['organization_id']}:{data['evaluated_year']}",
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': self.build_division_strategy_request(
+                    data['top_performers'], data['bottom_performers'], data['organization_name']
+                )
+            }, ensure_ascii=False)
+            for data in prepared
+        ]
+        
+        batch_file = await self.openai_client.files.create(
+            file=('team_annual_strategy_batch.jsonl', '\n'.join(lines).encode('utf-8')),
+            purpose='batch'
+        )
+        batch = await self.openai_client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h'
+        )
+        logger.info('📦 Batch 작업 생성: %s (%s건)', batch.id, len(lines))
+        
+        # 완료될 때까지 주기적으로 상태 확인
+        while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+            await asyncio.sleep(BATCH_POLL_INTERVAL_SECONDS)
+            batch = await self.openai_client.batches.retrieve(batch.id)
+            logger.info('⏳ Batch 작업 상태: %s', batch.status)
+        
+        if batch.status != 'completed' or not batch.output_file_id:
+            logger.error('❌ Batch 작업 실패: %s', batch.status)
+            return {}
+        
+        output = await self.openai_client.files.content(batch.output_file_id)
+        
+        strategies = {}
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            response = item.get('response') or {}
+            if item.get('error') or response.get('status_code') != 200:
+                logger.warning('⚠️ Batch 요청 %s 실패: %s', item.get('custom_id'), item.get('error'))
+                continue
+            strategies[item['custom_id']] = response['body']['choices'][0]['message']['content']
+        
+        logger.info('✅ Batch 관리 전략 생성 완료: %s/%s건', len(strategies), len(lines))
+        return strategies
     
-    async def process_all_organizations_all_years(self):
-        """모든 조직의 모든 연도 연말 평가 처리 (메인 함수)"""
+    async def process_organizations_concurrently(self, org_performance: Dict[str, Dict],
+                                                 org_name_mapping: Dict[int, str],
+                                                 evaluated_year: int) -> Tuple[int, int]:
+        """조직별 연말 평가를 세마포어로 제한해 동시에 처리, 일괄 저장 후 (성공, 실패) 수 반환"""
+        semaphore = asyncio.Semaphore(ORG_CONCURRENCY)
+        
+        async def run(org_id: str, performance: Dict) -> Optional[Dict]:
+            async with semaphore:
+                org_name = org_name_mapping.get(int(org_id), f'조직{org_id}')
+                return await self.process_organization_annual_evaluation(
+                    org_id, 
+                    org_name,
+                    performance, 
+                    evaluated_year
+                )
+        
+        results = await asyncio.gather(
+            *(run(org_id, performance) for org_id, performance in org_performance.items()),
+            return_exceptions=True
+        )
+        
+        documents = [result for result in results if isinstance(result, dict)]
+        if not await self.save_division_strategic_observations(documents):
+            documents = []
+        
+        success_count = len(documents)
+        return success_count, len(results) - success_count
+    
+    async def process_all_organizations_all_years(self, use_batch_api: bool = False):
+        """모든 조직의 모든 연도 연말 평가 처리 (메인 함수, use_batch_api=True면 OpenAI Batch API로 일괄 생성)"""
         try:
-            print(f'\n🚀 모든 조직 모든 연도 연말 전략적 관찰 생성 시작')
+            logger.info('🚀 모든 조직 모든 연도 연말 전략적 관찰 생성 시작')
             
             await self.connect_databases()
             
-            # 1. 조직 이름 매핑 조회
-            org_name_mapping = self.get_organization_names()
-            
-            # 2. 처리 가능한 모든 연도 조회
-            available_years = self.get_available_years()
+            # 1. 조직 이름 매핑(MariaDB), 처리 가능한 모든 연도(MongoDB) 및
+            #    연도별 조회가 공유하는 사용자-조직 매핑 캐시를 동시에 조회
+            org_name_mapping, available_years, _ = await asyncio.gather(
+                self.get_organization_names(),
+                self.get_available_years(),
+                self.get_user_organization_mapping()
+            )
             
             if not available_years:
-                print("⚠️ 처리할 연도 데이터가 없습니다.")
+                logger.warning('⚠️ 처리할 연도 데이터가 없습니다.')
                 return
             
-            total_success = 0
-            total_fail = 0
+            year_semaphore = asyncio.Semaphore(YEAR_CONCURRENCY)
             
-            # 3. 각 연도별로 모든 조직 처리
-            for year in available_years:
-                print(f'\n{"="*60}')
-                print(f'📅 {year}년 연말 처리 시작')
-                print(f'{"="*60}')
-                
-                # organization_id별로 보고서 조회
-                org_reports = self.get_reports_by_organization(year)
-                
-                if not org_reports:
-                    print(f"⚠️ {year}년 조직별 연말 보고서가 없습니다.")
-                    continue
-                
-                org_ids = list(org_reports.keys())
-                print(f'📋 처리 대상 조직: {", ".join([f"{org_id}({org_name_mapping.get(int(org_id), org_id)})" for org_id in org_ids])}')
-                
-                year_success = 0
-                year_fail = 0
-                
-                # 각 조직별로 순차적으로 처리
-                for org_id, reports in org_reports.items():
-                    org_name = org_name_mapping.get(int(org_id), f'조직{org_id}')
-                    result = await self.process_organization_annual_evaluation(
-                        org_id, 
-                        org_name,
-                        reports, 
-                        year
-                    )
+            async def run_year(year: int) -> Tuple[int, int, List[Dict]]:
+                """한 연도의 모든 조직 처리 후 (성공, 실패, Batch API 대기 데이터) 반환"""
+                async with year_semaphore:
+                    logger.info('📅 %s년 연말 처리 시작', year)
                     
-                    if result:
-                        year_success += 1
-                        total_success += 1
-                    else:
-                        year_fail += 1
-                        total_fail += 1
+                    # organization_id별로 보고서 조회
+                    org_performance = await self.get_division_performance_by_organization(year)
                     
-                    # OpenAI API 호출 제한을 고려한 지연 (1초)
-                    await asyncio.sleep(1)
+                    if not org_performance:
+                        logger.warning('⚠️ %s년 조직별 연말 보고서가 없습니다.', year)
+                        return 0, 0, []
+                    
+                    org_ids = list(org_performance.keys())
+                    logger.info('📋 처리 대상 조직: %s', ", ".join([f"{org_id}({org_name_mapping.get(int(org_id), org_id)})" for org_id in org_ids]))
+                    
+                    if use_batch_api:
+                        # Batch API 요청으로 모아 두고 연도 처리 후 한 번에 생성
+                        prepared = []
+                        year_fail = 0
+                        for org_id, performance in org_performance.items():
+                            org_name = org_name_mapping.get(int(org_id), f'조직{org_id}')
+                            data = self.prepare_organization_annual_evaluation(org_id, org_name, performance, year)
+                            if data:
+                                prepared.append(data)
+                            else:
+                                year_fail += 1
+                        return 0, year_fail, prepared
+                    
+                    # 각 조직별로 동시 처리
+                    year_success, year_fail = await self.process_organizations_concurrently(
+                        org_performance, org_name_mapping, year
+                    )
+                    
+                    logger.info('📊 %s년 결과: 성공 %s개, 실패 %s개', year, year_success, year_fail)
+                    return year_success, year_fail, []
+            
+            # 2. 연도별 처리를 제한된 동시성으로 실행 (한 연도가 실패해도 나머지 연도가 끝난 뒤에 연결 해제)
+            gathered = await asyncio.gather(*(run_year(year) for year in available_years), return_exceptions=True)
+            year_results = []
+            for year, result in zip(available_years, gathered):
+                if isinstance(result, BaseException):
+                    logger.error('❌ %s년 연말 처리 오류: %s', year, result, exc_info=result)
+                    continue
+                year_results.append(result)
+            
+            total_success = sum(result[0] for result in year_results)
+            total_fail = sum(result[1] for result in year_results)
+            batch_prepared = [data for result in year_results for data in result[2]]
+            
+            if batch_prepared:
+                strategies = await self.generate_strategies_with_batch_api(batch_prepared)
+                documents = []
+                for data in batch_prepared:
+                    strategy = strategies.get(f"{data['organization_id']}:{data['evaluated_year']}")
+                    if strategy is None:
+                        continue
+                    data['management_strategy'] = strategy
+                    documents.append(self.build_division_strategic_observation(data))
                 
-                print(f'📊 {year}년 결과: 성공 {year_success}개, 실패 {year_fail}개')
+                if not await self.save_division_strategic_observations(documents):
+                    documents = []
+                total_success += len(documents)
+                total_fail += len(batch_prepared) - len(documents)
             
-            print(f'\n🎉 모든 연도 연말 전략적 관찰 생성 완료!')
-            print(f'✅ 총 성공: {total_success}개')
-            print(f'❌ 총 실패: {total_fail}개')
+            logger.info('🎉 모든 연도 연말 전략적 관찰 생성 완료!')
+            logger.info('✅ 총 성공: %s개', total_success)
+            logger.info('❌ 총 실패: %s개', total_fail)
             
         except Exception as e:
-            print(f'❌ 전체 연말 평가 처리 오류: {e}')
+            logger.error('❌ 전체 연말 평가 처리 오류: %s', e)
             raise e
         finally:
-            self.disconnect_databases()
+            await self.disconnect_databases()
 
     async def process_all_organizations_annual_evaluation(self, evaluated_year: int):
         """특정 연도의 모든 조직 연말 평가 처리 (단일 연도용)"""
         try:
-            print(f'\n🚀 {evaluated_year}년 모든 조직 연말 보고서 생성 시작')
+            logger.info('🚀 %s년 모든 조직 연말 보고서 생성 시작', evaluated_year)
             
             await self.connect_databases()
             
-            # 1. 조직 이름 매핑 조회
-            org_name_mapping = self.get_organization_names()
-            
-            # 2. organization_id별로 보고서 조회
-            org_reports = self.get_reports_by_organization(evaluated_year)
+            # 1. 조직 이름 매핑과 organization_id별 보고서를 동시에 조회
+            org_name_mapping, org_performance = await asyncio.gather(
+                self.get_organization_names(),
+                self.get_division_performance_by_organization(evaluated_year)
+            )
             
-            if not org_reports:
-                print("⚠️ 처리할 조직별 연말 보고서가 없습니다.")
+            if not org_performance:
+                logger.warning('⚠️ 처리할 조직별 연말 보고서가 없습니다.')
                 return
             
-            org_ids = list(org_reports.keys())
-            print(f'📋 처리 대상 조직: {", ".join([f"{org_id}({org_name_mapping.get(int(org_id), org_id)})" for org_id in org_ids])}')
-            
-            success_count = 0
-            fail_count = 0
+            org_ids = list(org_performance.keys())
+            logger.info('📋 처리 대상 조직: %s', ", ".join([f"{org_id}({org_name_mapping.get(int(org_id), org_id)})" for org_id in org_ids]))
             
-            # 3. 각 조직별로 순차적으로 처리
-            for org_id, reports in org_reports.items():
-                org_name = org_name_mapping.get(int(org_id), f'조직{org_id}')
-                result = await self.process_organization_annual_evaluation(
-                    org_id, 
-                    org_name,
-                    reports, 
-                    evaluated_year
-                )
-                
-                if result:
-                    success_count += 1
-                else:
-                    fail_count += 1
-                
-                # OpenAI API 호출 제한을 고려한 지연 (1초)
-                await asyncio.sleep(1)
+            # 2. 각 조직별로 동시 처리
+            success_count, fail_count = await self.process_organizations_concurrently(
+                org_performance, org_name_mapping, evaluated_year
+            )
             
-            print(f'\n🎉 연말 보고서 생성 완료!')
-            print(f'✅ 성공: {success_count}개 조직')
-            print(f'❌ 실패: {fail_count}개 조직')
+            logger.info('🎉 연말 보고서 생성 완료!')
+            logger.info('✅ 성공: %s개 조직', success_count)
+            logger.info('❌ 실패: %s개 조직', fail_count)
             
         except Exception as e:
-            print(f'❌ 전체 연말 평가 처리 오류: {e}')
+            logger.error('❌ 전체 연말 평가 처리 오류: %s', e)
             raise e
         finally:
-            self.disconnect_databases()
+            await self.disconnect_databases()
 
 
 # 사용 예시 및 실행부
@@ -565,16 +742,19 @@ async def main():
         # await evaluation_system.process_all_organizations_annual_evaluation(2024)
         
     except Exception as e:
-        print(f'❌ 메인 처리 오류: {e}')
+        logger.exception('❌ 메인 처리 오류: %s', e)
         exit(1)
 
 
 if __name__ == '__main__':
+    log_listener = setup_logging()
     # Python 3.11.9에서 asyncio 실행
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("\n⚠️ 사용자에 의해 중단됨")
+        logger.warning('⚠️ 사용자에 의해 중단됨')
     except Exception as e:
-        print(f"❌ 실행 오류: {e}")
-        exit(1)
\ No newline at end of file
+        logger.error('❌ 실행 오류: %s', e)
+        exit(1)
+    finally:
+        log_listener.stop()
\ No newline at end of file
@@ -1,84 +1,220 @@
 import os
-import pymongo
-import pymysql
+import re
+import logging
+import sys
+from pathlib import Path
+import asyncio
+from collections import Counter
+from itertools import groupby, product
+from operator import itemgetter
+from pymongo import AsyncMongoClient, UpdateOne
+import aiomysql
 from datetime import datetime
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
 import json
 
+# 공용 모듈(app/common) 임포트 경로 추가
+_APP_DIR = str(Path(__file__).resolve().parents[2])
+if _APP_DIR not in sys.path:
+    sys.path.append(_APP_DIR)
+from common.logging_setup import setup_logging
+
 # 환경 변수 로드
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# reports 컬렉션 bulk_write 한 번에 보낼 최대 작업 수
+BULK_WRITE_BATCH_SIZE = 500
+
+# 동시에 생성할 리포트 수 (DB 동시 요청 한도)
+REPORT_CONCURRENCY = 32
+
+# memberAnalysis 항목의 점수 추출
+_get_score = itemgetter('score')
+
+# 분기별 시작/종료 월-일
+_QUARTER_RANGES = {
+    1: ('01-01', '03-31'),
+    2: ('04-01', '06-30'),
+    3: ('07-01', '09-30'),
+    4: ('10-01', '12-31')
+}
+
+# 개선 관련 키워드가 포함된 첫 문장 ('.' 기준)
+_IMPROVE_RE = re.compile(r'[^.]*(?:개선|보완|향상)[^.]*')
+
+# '.'으로 끝나는 문장 단위
+_SENTENCE_RE = re.compile(r'[^.]*\.')
+
+# MariaDB 풀 연결 재생성 주기 (초, 서버 wait_timeout보다 짧게)
+MARIA_POOL_RECYCLE_SECONDS = int(os.getenv('DB_POOL_RECYCLE', '3600'))
+
 class TeamQuarterReportGenerator:
     def __init__(self):
-        self.maria_connection = None
+        self.maria_pool = None
         self.mongo_client = None
         self.mongo_db = None
+        self.coll_ranking = None
+        self.coll_observations = None
+        self.coll_peer = None
+        self.coll_reports = None
+        self._pending_ops = []
+        self._batch_now = None
+        self._org_info_cache = {}
+        self._team_leader_cache = {}
         
-    def connect_databases(self):
+    async def connect_databases(self):
         """데이터베이스 연결"""
         try:
-            # MariaDB 연결
-            self.maria_connection = pymysql.connect(
+            # MariaDB 커넥션 풀 생성
+            self.maria_pool = await aiomysql.create_pool(
                 host=os.getenv('DB_HOST'),
                 port=int(os.getenv('DB_PORT')),
                 user=os.getenv('DB_USER'),
                 password=os.getenv('DB_PASSWORD'),
-                database=os.getenv('DB_NAME'),
-                charset='utf8mb4'
+                db=os.getenv('DB_NAME'),
+                charset='utf8mb4',
+                minsize=2,
+                maxsize=20,
+                autocommit=True,
+                # 서버 wait_timeout으로 끊긴 연결을 재사용하지 않도록 주기적으로 재연결
+                pool_recycle=MARIA_POOL_RECYCLE_SECONDS
             )
-            print('✅ MariaDB 연결 성공')
+            logger.info('[OK] MariaDB 연결 성공')
             
             # MongoDB 연결
             mongo_url = f"mongodb://{os.getenv('MONGO_USER')}:{os.getenv('MONGO_PASSWORD')}@{os.getenv('MONGO_HOST')}:{os.getenv('MONGO_PORT')}/{os.getenv('MONGO_DB_NAME')}?authSource=admin"
             
-            self.mongo_client = pymongo.MongoClient(mongo_url, serverSelectionTimeoutMS=5000)
-            self.mongo_client.admin.command('ping')
+            self.mongo_client = AsyncMongoClient(mongo_url, serverSelectionTimeoutMS=5000)
+            await self.mongo_client.admin.command('ping')
             self.mongo_db = self.mongo_client[os.getenv('MONGO_DB_NAME')]
-            print('✅ MongoDB 연결 성공')
+            logger.info('[OK] MongoDB 연결 성공')
+            
+            # 사용하는 컬렉션 핸들은 한 번만 생성해 재사용
+            self.coll_ranking = self.mongo_db['ranking_results']
+            self.coll_observations = self.mongo_db['team_strategic_observations']
+            self.coll_peer = self.mongo_db['peer_evaluation_results']
+            self.coll_reports = self.mongo_db['reports']
             
         except Exception as e:
-            print(f'❌ 데이터베이스 연결 오류: {e}')
+            logger.error('[ERR] 데이터베이스 연결 오류: %s', e)
             raise e
+        
+        await self.ensure_indexes()
+    
+    async def ensure_indexes(self):
+        """분기 문서 조회/업서트 필터용 MongoDB 인덱스 생성"""
+        # 팀 랭킹 문서만 대상 (personal-quarter 문서에는 organization_id가 없음)
+        await self.coll_ranking.create_index(
+            [('type', 1), ('organization_id', 1), ('evaluated_year', 1), ('evaluated_quarter', 1)],
+            unique=True,
+            partialFilterExpression={'organization_id': {'$exists': True}}
+        )
+        await self.coll_observations.create_index(
+            [('evaluated_year', 1), ('evaluated_quarter', 1), ('division_name', 1)]
+        )
+        await self.coll_peer.create_index(
+            [('type', 1), ('evaluated_year', 1), ('evaluated_quarter', 1), ('organization', 1)]
+        )
+        # 팀 분기 리포트만 대상 (개인 리포트와 upsert 키가 겹치지 않도록)
+        await self.coll_reports.create_index(
+            [('type', 1), ('user.userId', 1), ('evaluated_year', 1), ('evaluated_quarter', 1)],
+            unique=True,
+            partialFilterExpression={'type': 'team-quarter'}
+        )
     
-    def disconnect_databases(self):
+    async def disconnect_databases(self):
         """데이터베이스 연결 해제"""
         try:
-            if self.maria_connection:
-                self.maria_connection.close()
-                print('✅ MariaDB 연결 해제')
+            if self.maria_pool:
+                self.maria_pool.close()
+                await self.maria_pool.wait_closed()
+                self.maria_pool = None
+                logger.info('[OK] MariaDB 연결 해제')
             if self.mongo_client:
-                self.mongo_client.close()
-                print('✅ MongoDB 연결 해제')
+                await self.mongo_client.close()
+                logger.info('[OK] MongoDB 연결 해제')
+        except Exception as e:
+            logger.error('[ERR] 데이터베이스 연결 해제 오류: %s', e)
+    
+    async def prefetch_organization_info(self, org_ids: List[int]):
+        """조직 정보와 팀장 정보를 IN 조회 두 번으로 가져와 분기 간 재사용하도록 캐시"""
+        if not org_ids:
+            return
+        
+        placeholders = ', '.join(['%s'] * len(org_ids))
+        
+        try:
+            async with self.maria_pool.acquire() as conn, conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(f"""
+                    SELECT division_id, name as department
+                    FROM organizations 
+                    WHERE division_id IN ({placeholders})
+                """, org_ids)
+                org_rows = await cursor.fetchall()
+                
+                # 조직별 첫 번째 사용자를 팀장으로 사용
+                await cursor.execute(f"""
+                    SELECT u.organization_id, u.id as userId, u.name
+                    FROM users u
+                    JOIN (
+                        SELECT organization_id, MIN(id) as id
+                        FROM users
+                        WHERE organization_id IN ({placeholders})
+                        GROUP BY organization_id
+                    ) first_user ON u.id = first_user.id
+                """, org_ids)
+                leader_rows = await cursor.fetchall()
+            
+            for row in org_rows:
+                self._org_info_cache.setdefault(row['division_id'], {'department': row['department']})
+            for row in leader_rows:
+                self._team_leader_cache[row['organization_id']] = {'userId': row['userId'], 'name': row['name']}
+            # 조직/팀장 정보가 없는 조직도 기본값으로 캐시해 분기마다 단건 조회가 반복되지 않도록 함
+            for org_id in org_ids:
+                self._org_info_cache.setdefault(org_id, {'department': f'조직{org_id}'})
+                self._team_leader_cache.setdefault(org_id, {'userId': 0, 'name': '팀장 미지정'})
+            
+            logger.info('조직 정보 %s개, 팀장 정보 %s개 캐시 완료', len(self._org_info_cache), len(self._team_leader_cache))
+            
         except Exception as e:
-            print(f'❌ 데이터베이스 연결 해제 오류: {e}')
+            logger.error('[ERR] 조직/팀장 정보 일괄 조회 오류: %s', e)
     
-    def get_organization_info(self, org_id: int) -> Dict:
+    async def get_organization_info(self, org_id: int) -> Dict:
         """조직 정보 조회"""
+        if org_id in self._org_info_cache:
+            return dict(self._org_info_cache[org_id])
+        
         try:
-            with self.maria_connection.cursor(pymysql.cursors.DictCursor) as cursor:
+            async with self.maria_pool.acquire() as conn, conn.cursor(aiomysql.DictCursor) as cursor:
                 # 조직명 조회
-                cursor.execute("""
+                await cursor.execute("""
                     SELECT name as department
                     FROM organizations 
                     WHERE division_id = %s
                 """, (org_id,))
-                org_info = cursor.fetchone()
+                org_info = await cursor.fetchone()
                 
                 if not org_info:
-                    return {'department': f'조직{org_id}'}
+                    org_info = {'department': f'조직{org_id}'}
                 
-                return org_info
+                self._org_info_cache[org_id] = org_info
+                return dict(org_info)
                 
         except Exception as e:
-            print(f'❌ 조직 정보 조회 오류: {e}')
+            logger.error('[ERR] 조직 정보 조회 오류: %s', e)
             return {'department': f'조직{org_id}'}
     
-    def get_team_leader_info(self, org_id: int) -> Dict:
+    async def get_team_leader_info(self, org_id: int) -> Dict:
         """팀장 정보 조회 (해당 팀의 첫 번째 사용자)"""
+        if org_id in self._team_leader_cache:
+            return dict(self._team_leader_cache[org_id])
+        
         try:
-            with self.maria_connection.cursor(pymysql.cursors.DictCursor) as cursor:
-                cursor.execute("""
+            async with self.maria_pool.acquire() as conn, conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute("""
                     SELECT id as userId, name
                     FROM users 
                     WHERE organization_id = %s
@@ -86,62 +222,94 @@ class TeamQuarterReportGenerator:
                     LIMIT 1
                 """, (org_id,))
                 
-                leader = cursor.fetchone()
+                leader = await cursor.fetchone()
                 
                 if not leader:
-                    return {'userId': 0, 'name': '팀장 미지정'}
+                    leader = {'userId': 0, 'name': '팀장 미지정'}
                 
-                return leader
+                self._team_leader_cache[org_id] = leader
+                return dict(leader)
                 
         except Exception as e:
-            print(f'❌ 팀장 정보 조회 오류: {e}')
+            logger.error('[ERR] 팀장 정보 조회 오류: %s', e)
             return {'userId': 0, 'name': '팀장 미지정'}
     
-    def get_member_analysis(self, org_id: int, year: int, quarter: int) -> List[Dict]:
-        """팀 멤버 분석 데이터 조회 (team_ranking_info.py 결과)"""
-        try:
-            collection = self.mongo_db['ranking_results']
-            
-            document = collection.find_one({
+    async def prefetch_quarter_documents(self, year: int, quarter: int, org_ids: List[int]) -> Dict[str, Dict]:
+        """분기 리포트에 필요한 문서를 컬렉션별 한 번의 조회로 가져와 키별로 색인"""
+        # 리포트에 사용하는 필드만 조회
+        # team_strategic_observations는 해당 분기와 fallback용 4분기 데이터를 한 번에 조회
+        # peer_evaluation_results는 organization_name 매칭과 organization ID 매칭에 모두 사용
+        ranking_docs, observation_docs, peer_docs = await asyncio.gather(
+            self.coll_ranking.find({
                 'type': 'team-quarter',
-                'organization_id': org_id,
+                'evaluated_year': year,
+                'evaluated_quarter': quarter,
+                'organization_id': {'$in': org_ids}
+            }, {'_id': 0, 'organization_id': 1, 'memberAnalysis': 1}).to_list(length=None),
+            self.coll_observations.find({
+                'evaluated_year': year,
+                'evaluated_quarter': {'$in': [quarter, 4]}
+            }, {
+                '_id': 0,
+                'division_name': 1,
+                'evaluated_quarter': 1,
+                'top_performers': 1,
+                'bottom_performers': 1
+            }).to_list(length=None),
+            self.coll_peer.find({
+                'type': 'team_quarter',
                 'evaluated_year': year,
                 'evaluated_quarter': quarter
-            })
-            
-            if not document or 'memberAnalysis' not in document:
-                print(f'⚠️ 조직 {org_id}의 {year}년 {quarter}분기 멤버 분석 데이터가 없습니다.')
-                return []
-            
-            return document['memberAnalysis']
-            
-        except Exception as e:
-            print(f'❌ 멤버 분석 데이터 조회 오류: {e}')
+            }, {
+                '_id': 0,
+                'organization': 1,
+                'organization_name': 1,
+                'top_negative_keywords': 1,
+                'improvement_recommendations': 1
+            }).to_list(length=None)
+        )
+        
+        return {
+            'ranking': {doc['organization_id']: doc for doc in ranking_docs},
+            'observations': {
+                doc.get('division_name'): doc for doc in observation_docs if doc['evaluated_quarter'] == quarter
+            },
+            'fallback_observations': {
+                doc.get('division_name'): doc for doc in observation_docs if doc['evaluated_quarter'] == 4
+            },
+            'peer_by_org': {doc.get('organization'): doc for doc in peer_docs},
+            'peer_by_name': {doc.get('organization_name'): doc for doc in peer_docs}
+        }
+    
+    def get_member_analysis(self, org_id: int, year: int, quarter: int, document: Optional[Dict]) -> List[Dict]:
+        """팀 멤버 분석 데이터 조회 (team_ranking_info.py 결과)"""
+        if not document or 'memberAnalysis' not in document:
+            logger.warning('[WARN] 조직 %s의 %s년 %s분기 멤버 분석 데이터가 없습니다.', org_id, year, quarter)
             return []
+        
+        return document['memberAnalysis']
     
-    def get_hr_suggestions(self, department: str, year: int, quarter: int) -> List[Dict]:
+    @staticmethod
+    def _truncate(text: str, max_len: int = 150) -> str:
+        """max_len을 넘으면 말줄임표를 붙여 자르기"""
+        return text[:max_len - 3] + "..." if len(text) > max_len else text
+    
+    @staticmethod
+    def _first_sentence(text: str, max_len: int = 150) -> str:
+        """첫 번째 '.'까지의 문장 추출 ('.'이 없으면 전체에 '.' 추가) 후 max_len으로 자르기"""
+        return TeamQuarterReportGenerator._truncate(text.partition('.')[0] + '.', max_len)
+    
+    def get_hr_suggestions(self, department: str, year: int, quarter: int,
+                           document: Optional[Dict], fallback_document: Optional[Dict] = None) -> List[Dict]:
         """HR 제안사항 생성 (team_strategic_observations 결과 활용)"""
         try:
-            collection = self.mongo_db['team_strategic_observations']
-            
-            # 먼저 해당 분기 데이터 조회
-            document = collection.find_one({
-                'division_name': department,
-                'evaluated_year': year,
-                'evaluated_quarter': quarter
-            })
-            
             # 해당 분기 데이터가 없으면 4분기 데이터로 fallback
             if not document and quarter != 4:
-                print(f'⚠️ {department}의 {year}년 {quarter}분기 데이터가 없어 4분기 데이터를 사용합니다.')
-                document = collection.find_one({
-                    'division_name': department,
-                    'evaluated_year': year,
-                    'evaluated_quarter': 4
-                })
+                logger.warning('[WARN] %s의 %s년 %s분기 데이터가 없어 4분기 데이터를 사용합니다.', department, year, quarter)
+                document = fallback_document
             
             if not document:
-                print(f'⚠️ {department}의 {year}년 전략적 관찰 데이터가 없습니다.')
+                logger.warning('[WARN] %s의 %s년 전략적 관찰 데이터가 없습니다.', department, year)
                 return []
             
             suggestions = []
@@ -156,10 +324,7 @@ class TeamQuarterReportGenerator:
                     final_comment = performer.get('finalComment', '')
                     if user_name and final_comment:
                         # finalComment에서 첫 번째 문장이나 적절한 길이로 추출
-                        sentences = final_comment.split('.')
-                        recommendation = sentences[0] + '.' if sentences else final_comment
-                        if len(recommendation) > 150:
-                            recommendation = recommendation[:147] + "..."
+                        recommendation = self._first_sentence(final_comment)
                         
                         suggestions.append({
                             'target': user_name,
@@ -176,48 +341,34 @@ class TeamQuarterReportGenerator:
                     final_comment = performer.get('finalComment', '')
                     if user_name and final_comment:
                         # finalComment에서 개선 필요 부분 추출
-                        sentences = final_comment.split('.')
                         # "개선이 필요한" 또는 "보완"이 포함된 문장 찾기
-                        improvement_sentence = None
-                        for sentence in sentences:
-                            if '개선' in sentence or '보완' in sentence or '향상' in sentence:
-                                improvement_sentence = sentence.strip() + '.'
-                                break
-                        
-                        if not improvement_sentence and sentences:
-                            improvement_sentence = sentences[-1].strip() + '.'  # 마지막 문장 사용
-                        
-                        recommendation = improvement_sentence if improvement_sentence else "개별 역량 강화 프로그램 참여를 권장합니다."
+                        match = _IMPROVE_RE.search(final_comment)
+                        if match:
+                            improvement_sentence = match.group(0).strip() + '.'
+                        else:
+                            improvement_sentence = final_comment.rsplit('.', 1)[-1].strip() + '.'  # 마지막 문장 사용
                         
-                        if len(recommendation) > 150:
-                            recommendation = recommendation[:147] + "..."
+                        recommendation = self._truncate(
+                            improvement_sentence if improvement_sentence else "개별 역량 강화 프로그램 참여를 권장합니다."
+                        )
                         
                         suggestions.append({
                             'target': user_name,
                             'recommendation': recommendation
                         })
             
-            print(f'✅ {department} HR 제안사항 {len(suggestions)}개 생성 완료')
+            logger.info('[OK] %s HR 제안사항 %s개 생성 완료', department, len(suggestions))
             return suggestions
             
         except Exception as e:
-            print(f'❌ HR 제안사항 조회 오류: {e}')
+            logger.error('[ERR] HR 제안사항 조회 오류: %s', e)
             return []
     
-    def get_org_suggestions(self, org_id: int, year: int, quarter: int) -> Dict:
+    def get_org_suggestions(self, org_id: int, year: int, quarter: int, document: Optional[Dict]) -> Dict:
         """조직 제안사항 조회 (team_negative_peer_solution.py 결과 활용)"""
         try:
-            collection = self.mongo_db['peer_evaluation_results']
-            
-            document = collection.find_one({
-                'type': 'team_quarter',
-                'organization': org_id,
-                'evaluated_year': year,
-                'evaluated_quarter': quarter
-            })
-            
             if not document:
-                print(f'⚠️ 조직 {org_id}의 {year}년 {quarter}분기 부정적 키워드 분석 데이터가 없습니다.')
+                logger.warning('[WARN] 조직 %s의 %s년 %s분기 부정적 키워드 분석 데이터가 없습니다.', org_id, year, quarter)
                 return {
                     'suggestion': '분석 데이터가 부족합니다.'
                 }
@@ -239,59 +390,40 @@ class TeamQuarterReportGenerator:
             }
             
         except Exception as e:
-            print(f'❌ 조직 제안사항 조회 오류: {e}')
+            logger.error('[ERR] 조직 제안사항 조회 오류: %s', e)
             return {
                 'suggestion': '데이터 조회 중 오류가 발생했습니다.'
             }
     
-    def get_final_comment(self, department: str, year: int, quarter: int, org_id: int) -> str:
+    def get_final_comment(self, department: str, year: int, quarter: int, org_id: int, document: Optional[Dict]) -> str:
         """최종 코멘트 조회 (peer_evaluation_results의 improvement_recommendations 활용)"""
         try:
-            collection = self.mongo_db['peer_evaluation_results']
-            
-            # organization_name과 department 매칭하여 동일 부서 찾기
-            document = collection.find_one({
-                'type': 'team_quarter',
-                'organization_name': department,
-                'evaluated_year': year,
-                'evaluated_quarter': quarter
-            })
-            
-            # organization_name으로 찾지 못하면 organization ID로 시도
             if not document:
-                document = collection.find_one({
-                    'type': 'team_quarter',
-                    'organization': org_id,
-                    'evaluated_year': year,
-                    'evaluated_quarter': quarter
-                })
-            
-            if not document:
-                print(f'⚠️ {department}의 {year}년 {quarter}분기 peer evaluation 데이터가 없습니다.')
+                logger.warning('[WARN] %s의 %s년 %s분기 peer evaluation 데이터가 없습니다.', department, year, quarter)
                 return f"{department}는 {year}년 {quarter}분기에 안정적인 성과를 기록했으며, 지속적인 개선을 통해 더욱 발전할 것으로 기대됩니다."
             
             improvement_recommendations = document.get('improvement_recommendations', '')
             
             if not improvement_recommendations:
-                print(f'⚠️ {department}의 improvement_recommendations가 비어있습니다.')
+                logger.warning('[WARN] %s의 improvement_recommendations가 비어있습니다.', department)
                 return f"{department}는 {year}년 {quarter}분기에 전반적으로 양호한 성과를 보였습니다."
             
             # improvement_recommendations 내용을 최종 코멘트로 사용
             # 너무 긴 경우 적절히 요약
             if len(improvement_recommendations) > 400:
                 # 첫 번째 문단이나 적절한 길이로 자르기
-                lines = improvement_recommendations.split('\n')
-                first_paragraph = next((line.strip() for line in lines if line.strip() and len(line.strip()) > 50), improvement_recommendations)
+                # 50자를 넘는 첫 번째 줄 (줄마다 strip은 한 번만 수행)
+                lines = map(str.strip, improvement_recommendations.split('\n'))
+                first_paragraph = next((line for line in lines if len(line) > 50), improvement_recommendations)
                 
                 if len(first_paragraph) > 400:
-                    # 첫 번째 문장들로 자르기
-                    sentences = first_paragraph.split('.')
-                    result = ""
-                    for sentence in sentences:
-                        if len(result + sentence + '.') <= 400:
-                            result += sentence + '.'
-                        else:
+                    # 400자 이내에서 끝나는 마지막 문장까지 자르기
+                    result_end = 0
+                    for match in _SENTENCE_RE.finditer(first_paragraph):
+                        if match.end() > 400:
                             break
+                        result_end = match.end()
+                    result = first_paragraph[:result_end]
                     
                     if len(result) < 100:  # 너무 짧으면 원본의 400자 사용
                         result = improvement_recommendations[:397] + "..."
@@ -303,7 +435,7 @@ class TeamQuarterReportGenerator:
                 return improvement_recommendations
             
         except Exception as e:
-            print(f'❌ 최종 코멘트 조회 오류: {e}')
+            logger.error('[ERR] 최종 코멘트 조회 오류: %s', e)
             return f"{department}는 {year}년 {quarter}분기에 지속적인 성장을 보여주고 있습니다."
     
     def calculate_team_final_score(self, member_analysis: List[Dict]) -> float:
@@ -311,39 +443,40 @@ class TeamQuarterReportGenerator:
         if not member_analysis:
             return 0.0
         
-        total_score = sum(member.get('score', 0) for member in member_analysis)
+        try:
+            total_score = sum(map(_get_score, member_analysis))
+        except KeyError:
+            # score가 없는 멤버가 있으면 0점으로 계산
+            total_score = sum(member.get('score', 0) for member in member_analysis)
         return round(total_score / len(member_analysis), 1)
     
     def get_quarter_dates(self, year: int, quarter: int) -> tuple:
         """분기별 시작/종료 날짜 계산"""
-        quarter_dates = {
-            1: (f"{year}-01-01", f"{year}-03-31"),
-            2: (f"{year}-04-01", f"{year}-06-30"),
-            3: (f"{year}-07-01", f"{year}-09-30"),
-            4: (f"{year}-10-01", f"{year}-12-31")
-        }
-        return quarter_dates.get(quarter, (f"{year}-01-01", f"{year}-12-31"))
+        start, end = _QUARTER_RANGES.get(quarter, ('01-01', '12-31'))
+        return f"{year}-{start}", f"{year}-{end}"
     
-    def generate_team_quarter_report(self, org_id: int, year: int, quarter: int) -> Dict:
-        """최종 팀 분기 리포트 생성"""
+    async def generate_team_quarter_report(self, org_id: int, year: int, quarter: int,
+                                     prefetched: Optional[Dict[str, Dict]] = None) -> Dict:
+        """최종 팀 분기 리포트 생성 (prefetched: prefetch_quarter_documents 결과)"""
         try:
-            print(f'\n🔄 조직 {org_id}의 {year}년 {quarter}분기 리포트 생성 시작')
-            
-            # 1. 기본 조직 정보 조회
-            org_info = self.get_organization_info(org_id)
-            department = org_info['department']
+            logger.info('조직 %s의 %s년 %s분기 리포트 생성 시작', org_id, year, quarter)
             
-            # 2. 팀장 정보 조회
-            team_leader = self.get_team_leader_info(org_id)
-            team_leader['department'] = department
+            if prefetched is None:
+                prefetched = await self.prefetch_quarter_documents(year, quarter, [org_id])
             
-            # 3. 멤버 분석 데이터 조회
-            member_analysis = self.get_member_analysis(org_id, year, quarter)
+            # 1. 멤버 분석 데이터 조회 (없으면 조직/팀장 조회 없이 바로 중단)
+            member_analysis = self.get_member_analysis(org_id, year, quarter, prefetched['ranking'].get(org_id))
             
             if not member_analysis:
-                print(f'❌ 조직 {org_id}의 멤버 분석 데이터가 없어 리포트 생성을 중단합니다.')
+                logger.warning('[WARN] 조직 %s의 멤버 분석 데이터가 없어 리포트 생성을 중단합니다.', org_id)
                 return None
             
+            # 2~3. 기본 조직 정보와 팀장 정보 조회 (prefetch_organization_info 이후에는 캐시에서 반환)
+            org_info = await self.get_organization_info(org_id)
+            team_leader = await self.get_team_leader_info(org_id)
+            department = org_info['department']
+            team_leader['department'] = department
+            
             # 4. 팀 평균 점수 계산
             final_score = self.calculate_team_final_score(member_analysis)
             
@@ -351,13 +484,18 @@ class TeamQuarterReportGenerator:
             start_date, end_date = self.get_quarter_dates(year, quarter)
             
             # 6. HR 제안사항 조회
-            hr_suggestions = self.get_hr_suggestions(department, year, quarter)
+            hr_suggestions = self.get_hr_suggestions(
+                department, year, quarter,
+                prefetched['observations'].get(department),
+                prefetched['fallback_observations'].get(department)
+            )
             
             # 7. 조직 제안사항 조회
-            org_suggestions = self.get_org_suggestions(org_id, year, quarter)
+            org_suggestions = self.get_org_suggestions(org_id, year, quarter, prefetched['peer_by_org'].get(org_id))
             
-            # 8. 최종 코멘트 조회 (org_id 매개변수 포함)
-            final_comment = self.get_final_comment(department, year, quarter, org_id)
+            # 8. 최종 코멘트 조회 (organization_name으로 찾지 못하면 organization ID로 시도)
+            peer_document = prefetched['peer_by_name'].get(department) or prefetched['peer_by_org'].get(org_id)
+            final_comment = self.get_final_comment(department, year, quarter, org_id, peer_document)
             
             # 9. 최종 리포트 구성
             report = {
@@ -365,7 +503,6 @@ class TeamQuarterReportGenerator:
                 'evaluated_year': year,
                 'evaluated_quarter': quarter,
                 'title': f'{year}년 {quarter}분기 {department} 분기 리포트',
-                'created_at': datetime.now().strftime('%Y-%m-%d'),
                 'startDate': start_date,
                 'endDate': end_date,
                 'user': team_leader,
@@ -376,60 +513,77 @@ class TeamQuarterReportGenerator:
                 'finalComment': final_comment
             }
             
-            print(f'✅ 조직 {org_id} ({department}) 리포트 생성 완료')
-            print(f'   - 팀원 수: {len(member_analysis)}명')
-            print(f'   - 팀 평균 점수: {final_score}점')
-            print(f'   - HR 제안: {len(hr_suggestions)}개')
+            logger.info('[OK] 조직 %s (%s) 리포트 생성 완료', org_id, department)
+            logger.debug('- 팀원 수: %s명', len(member_analysis))
+            logger.debug('- 팀 평균 점수: %s점', final_score)
+            logger.debug('- HR 제안: %s개', len(hr_suggestions))
             
             return report
             
         except Exception as e:
-            print(f'❌ 조직 {org_id} 리포트 생성 오류: {e}')
-            import traceback
-            traceback.print_exc()
+            logger.exception('[ERR] 조직 %s 리포트 생성 오류: %s', org_id, e)
             return None
     
-    def save_team_report_to_mongodb(self, report: Dict) -> bool:
-        """팀 리포트를 MongoDB reports 컬렉션에 저장"""
+    def queue_team_report(self, report: Dict):
+        """팀 리포트 upsert 작업을 대기열에 추가 (flush_team_reports에서 일괄 저장)"""
+        filter_query = {
+            'type': 'team-quarter',
+            'user.userId': report['user']['userId'],  # 팀장 ID 기준
+            'evaluated_year': report['evaluated_year'],
+            'evaluated_quarter': report['evaluated_quarter']
+        }
+        self._pending_ops.append((filter_query, report))
+    
+    async def flush_team_reports(self) -> bool:
+        """대기 중인 팀 리포트를 MongoDB reports 컬렉션에 unordered bulk_write로 일괄 저장"""
+        if not self._pending_ops:
+            return True
+        
+        pending_ops, self._pending_ops = self._pending_ops, []
+        
         try:
-            if not report:
-                return False
-            
-            collection = self.mongo_db['reports']
-            
-            # 기존 데이터가 있으면 업데이트, 없으면 삽입
-            filter_query = {
-                'type': 'team-quarter',
-                'user.userId': report['user']['userId'],  # 팀장 ID 기준
-                'evaluated_year': report['evaluated_year'],
-                'evaluated_quarter': report['evaluated_quarter']
-            }
-            
-            # created_at, updated_at 추가
-            report['created_at'] = datetime.now()
-            report['updated_at'] = datetime.now()
-            
-            result = collection.replace_one(filter_query, report, upsert=True)
+            collection = self.coll_reports
+            now = self._batch_now or datetime.now()
+            
+            # 기존 데이터가 있으면 업데이트(created_at 유지), 없으면 삽입
+            operations = [
+                UpdateOne(
+                    filter_query,
+                    {
+                        '$set': {**report, 'updated_at': now},
+                        '$setOnInsert': {'created_at': now}
+                    },
+                    upsert=True
+                )
+                for filter_query, report in pending_ops
+            ]
             
-            org_name = report['user']['department']
-            year = report['evaluated_year']
-            quarter = report['evaluated_quarter']
-            
-            if result.upserted_id:
-                print(f'✅ {org_name} {year}년 {quarter}분기 리포트 신규 저장: {result.upserted_id}')
-            else:
-                print(f'✅ {org_name} {year}년 {quarter}분기 리포트 업데이트 완료')
+            upserted_count = 0
+            modified_count = 0
+            for start in range(0, len(operations), BULK_WRITE_BATCH_SIZE):
+                result = await collection.bulk_write(operations[start:start + BULK_WRITE_BATCH_SIZE], ordered=False)
+                upserted_count += result.upserted_count
+                modified_count += result.modified_count
             
+            logger.info('[OK] 팀 리포트 일괄 저장 완료: 신규 %s개, 업데이트 %s개', upserted_count, modified_count)
             return True
             
         except Exception as e:
-            print(f'❌ 팀 리포트 저장 오류: {e}')
+            logger.error('[ERR] 팀 리포트 저장 오류: %s', e)
+            return False
+    
+    async def save_team_report_to_mongodb(self, report: Dict) -> bool:
+        """팀 리포트를 MongoDB reports 컬렉션에 저장"""
+        if not report:
             return False
+        
+        self.queue_team_report(report)
+        return await self.flush_team_reports()
     
-    def get_available_quarters(self) -> List[tuple]:
+    async def get_available_quarters(self) -> List[tuple]:
         """처리 가능한 모든 분기 조회 (team-quarter 타입만, team-annual 제외)"""
         try:
-            collection = self.mongo_db['ranking_results']
+            collection = self.coll_ranking
             pipeline = [
                 {"$match": {"type": "team-quarter"}},  # team-annual 제외
                 {"$group": {
@@ -441,94 +595,118 @@ class TeamQuarterReportGenerator:
                 {"$sort": {"_id.year": 1, "_id.quarter": 1}}
             ]
             
-            quarters = list(collection.aggregate(pipeline))
+            quarters = await (await collection.aggregate(pipeline)).to_list(length=None)
             quarter_list = [(q['_id']['year'], q['_id']['quarter']) for q in quarters]
             
-            print(f"📅 처리 가능한 분기: {quarter_list}")
+            logger.info('처리 가능한 분기: %s', quarter_list)
             return quarter_list
             
         except Exception as e:
-            print(f'❌ 분기 데이터 조회 오류: {e}')
+            logger.error('[ERR] 분기 데이터 조회 오류: %s', e)
             return []
     
-    def get_available_organizations(self) -> List[int]:
+    async def get_available_organizations(self) -> List[int]:
         """처리 가능한 모든 조직 조회"""
         try:
-            collection = self.mongo_db['ranking_results']
+            collection = self.coll_ranking
             pipeline = [
                 {"$match": {"type": "team-quarter"}},  # team-annual 제외
                 {"$group": {"_id": "$organization_id"}},
                 {"$sort": {"_id": 1}}
             ]
             
-            orgs = list(collection.aggregate(pipeline))
+            orgs = await (await collection.aggregate(pipeline)).to_list(length=None)
             org_list = [org['_id'] for org in orgs if org['_id'] is not None]
             
-            print(f"🏢 처리 가능한 조직: {org_list}")
+            logger.info('처리 가능한 조직: %s', org_list)
             return org_list
             
         except Exception as e:
-            print(f'❌ 조직 데이터 조회 오류: {e}')
+            logger.error('[ERR] 조직 데이터 조회 오류: %s', e)
             return []
     
-    def generate_all_team_reports_all_quarters(self) -> Dict:
+    async def generate_all_team_reports_all_quarters(self) -> Dict:
         """모든 팀의 모든 분기 리포트 생성 및 저장"""
         try:
-            print(f'\n🚀 모든 팀 모든 분기 리포트 생성 시작')
+            logger.info('모든 팀 모든 분기 리포트 생성 시작')
+            
+            # 실행 전체에서 동일한 created_at/updated_at 사용
+            self._batch_now = datetime.now()
             
             # 1. 처리 가능한 분기 목록 조회
-            available_quarters = self.get_available_quarters()
+            available_quarters = await self.get_available_quarters()
             
             # 2. 처리 가능한 조직 목록 조회
-            available_orgs = self.get_available_organizations()
+            available_orgs = await self.get_available_organizations()
             
             if not available_quarters or not available_orgs:
-                print("❌ 처리할 데이터가 없습니다.")
+                logger.warning('[WARN] 처리할 데이터가 없습니다.')
                 return {'success': 0, 'failed': 0, 'total': 0}
             
             total_tasks = len(available_quarters) * len(available_orgs)
-            print(f'📋 총 처리 대상: {len(available_orgs)}개 조직 × {len(available_quarters)}개 분기 = {total_tasks}개 작업')
+            logger.info('총 처리 대상: %s개 조직 x %s개 분기 = %s개 작업', len(available_orgs), len(available_quarters), total_tasks)
             
             success_count = 0
             failed_count = 0
             
-            # 3. 분기별로 모든 조직 처리
-            for year, quarter in available_quarters:
-                print(f'\n{"="*60}')
-                print(f'📅 {year}년 {quarter}분기 처리 시작')
-                print(f'{"="*60}')
-                
-                quarter_success = 0
+            # 3. 분기와 무관한 조직/팀장 정보는 한 번만 조회해 캐시
+            await self.prefetch_organization_info(available_orgs)
+            
+            # 분기별 모든 조직 문서를 컬렉션별로 한 번에 조회
+            prefetched_by_quarter = dict(zip(
+                available_quarters,
+                await asyncio.gather(*(
+                    self.prefetch_quarter_documents(year, quarter, available_orgs)
+                    for year, quarter in available_quarters
+                ))
+            ))
+            
+            # 4. 모든 분기 × 조직 리포트를 세마포어로 제한해 동시에 생성
+            semaphore = asyncio.Semaphore(REPORT_CONCURRENCY)
+            
+            async def run(org_id: int, year: int, quarter: int) -> Optional[Dict]:
+                async with semaphore:
+                    return await self.generate_team_quarter_report(
+                        org_id, year, quarter, prefetched_by_quarter[(year, quarter)]
+                    )
+            
+            # (분기, 조직) 작업 목록 - 분기 순으로 정렬되어 있어 결과를 분기별로 묶을 수 있음
+            tasks = list(product(available_quarters, available_orgs))
+            results = await asyncio.gather(
+                *(run(org_id, year, quarter) for (year, quarter), org_id in tasks),
+                return_exceptions=True
+            )
+            
+            # 5. 분기별 결과 집계 및 일괄 저장
+            for (year, quarter), quarter_results in groupby(zip(tasks, results), key=lambda item: item[0][0]):
+                quarter_queued = 0
                 quarter_failed = 0
                 
-                for org_id in available_orgs:
-                    try:
-                        # 리포트 생성
-                        report = self.generate_team_quarter_report(org_id, year, quarter)
-                        
-                        if report:
-                            # MongoDB에 저장
-                            if self.save_team_report_to_mongodb(report):
-                                success_count += 1
-                                quarter_success += 1
-                            else:
-                                failed_count += 1
-                                quarter_failed += 1
-                        else:
-                            failed_count += 1
-                            quarter_failed += 1
-                            
-                    except Exception as e:
-                        print(f'❌ 조직 {org_id} 처리 오류: {e}')
-                        failed_count += 1
+                for (_, org_id), report in quarter_results:
+                    if isinstance(report, Exception):
+                        logger.error('[ERR] 조직 %s 처리 오류: %s', org_id, report)
+                        quarter_failed += 1
+                    elif report:
+                        self.queue_team_report(report)
+                        quarter_queued += 1
+                    else:
                         quarter_failed += 1
                 
-                print(f'📊 {year}년 {quarter}분기 결과: 성공 {quarter_success}개, 실패 {quarter_failed}개')
+                # 분기 리포트 일괄 저장
+                if await self.flush_team_reports():
+                    quarter_success = quarter_queued
+                else:
+                    quarter_success = 0
+                    quarter_failed += quarter_queued
+                
+                success_count += quarter_success
+                failed_count += quarter_failed
+                logger.info('%s년 %s분기 결과: 성공 %s개, 실패 %s개', year, quarter, quarter_success, quarter_failed)
             
-            print(f'\n🎉 전체 처리 완료!')
-            print(f'✅ 총 성공: {success_count}개')
-            print(f'❌ 총 실패: {failed_count}개')
-            print(f'📈 성공률: {(success_count/total_tasks)*100:.1f}%' if total_tasks > 0 else '0%')
+            logger.info('전체 처리 완료!')
+            logger.info('총 성공: %s개', success_count)
+            logger.info('총 실패: %s개', failed_count)
+            logger.info('성공률: %.1f%%', (success_count/total_tasks)*100 if total_tasks > 0 else 0)
             
             return {
                 'success': success_count,
@@ -538,84 +716,93 @@ class TeamQuarterReportGenerator:
             }
             
         except Exception as e:
-            print(f'❌ 전체 팀 리포트 생성 오류: {e}')
-            import traceback
-            traceback.print_exc()
+            logger.exception('[ERR] 전체 팀 리포트 생성 오류: %s', e)
             return {'success': 0, 'failed': 0, 'total': 0}
     
-    def show_saved_reports_summary(self):
+    async def show_saved_reports_summary(self):
         """저장된 리포트 요약 확인"""
         try:
-            print(f"\n📊 저장된 팀 리포트 요약")
-            print("="*60)
+            logger.info('저장된 팀 리포트 요약')
             
-            collection = self.mongo_db['reports']
+            collection = self.coll_reports
             
-            # team-quarter 타입 문서 조회
-            team_docs = list(collection.find({'type': 'team-quarter'}))
+            # team-quarter 타입 문서를 분기/팀장 순으로 서버에서 정렬 (memberAnalysis는 배열 대신 인원 수만 전송)
+            pipeline = [
+                {'$match': {'type': 'team-quarter'}},
+                {'$project': {
+                    '_id': 0,
+                    'evaluated_year': 1,
+                    'evaluated_quarter': 1,
+                    'user.department': 1,
+                    'user.name': 1,
+                    'user.userId': 1,
+                    'finalScore': 1,
+                    'memberCount': {'$size': {'$ifNull': ['$memberAnalysis', []]}}
+                }},
+                {'$sort': {'evaluated_year': 1, 'evaluated_quarter': 1, 'user.userId': 1}}
+            ]
+            # 커서를 배치 단위로 받아가며 바로 출력 (전체 리포트를 메모리에 적재하지 않음)
+            reports_per_quarter = Counter()
+            cursor = await collection.aggregate(pipeline, batchSize=500)
+            async for doc in cursor:
+                quarter_key = (doc['evaluated_year'], doc['evaluated_quarter'])
+                # 정렬된 순서대로 분기가 바뀔 때마다 분기 헤더 출력
+                if quarter_key not in reports_per_quarter:
+                    logger.info('%s년 %s분기:', doc['evaluated_year'], doc['evaluated_quarter'])
+                reports_per_quarter[quarter_key] += 1
+                
+                team_name = doc['user']['department']
+                leader_name = doc['user']['name']
+                final_score = doc.get('finalScore', 0)
+                logger.info('%s (팀장: %s): %s점, %s명', team_name, leader_name, final_score, doc['memberCount'])
             
-            if not team_docs:
-                print("❌ 저장된 팀 리포트가 없습니다.")
+            if not reports_per_quarter:
+                logger.warning('[WARN] 저장된 팀 리포트가 없습니다.')
                 return
             
-            print(f"📋 총 {len(team_docs)}개의 팀 리포트 저장됨")
-            
-            # 분기별 그룹화
-            by_quarter = {}
-            for doc in team_docs:
-                key = f"{doc['evaluated_year']}년 {doc['evaluated_quarter']}분기"
-                if key not in by_quarter:
-                    by_quarter[key] = []
-                by_quarter[key].append(doc)
-            
-            for quarter_key, docs in sorted(by_quarter.items()):
-                print(f"\n🗓️ {quarter_key}:")
-                for doc in sorted(docs, key=lambda x: x['user']['userId']):
-                    team_name = doc['user']['department']
-                    leader_name = doc['user']['name']
-                    final_score = doc.get('finalScore', 0)
-                    member_count = len(doc.get('memberAnalysis', []))
-                    print(f"   {team_name} (팀장: {leader_name}): {final_score}점, {member_count}명")
+            logger.info('총 %s개의 팀 리포트 저장됨', sum(reports_per_quarter.values()))
+            for (year, quarter), count in reports_per_quarter.items():
+                logger.info('%s년 %s분기: %s개', year, quarter, count)
             
         except Exception as e:
-            print(f'❌ 리포트 요약 확인 오류: {e}')
+            logger.error('[ERR] 리포트 요약 확인 오류: %s', e)
 
 
-def main():
+async def main():
     """메인 실행 함수"""
+    log_listener = setup_logging()
     generator = TeamQuarterReportGenerator()
     
     try:
-        generator.connect_databases()
+        await generator.connect_databases()
         
         # 모든 팀의 모든 분기 리포트 생성 및 MongoDB 저장
-        result = generator.generate_all_team_reports_all_quarters()
+        result = await generator.generate_all_team_reports_all_quarters()
         
-        print(f'\n📊 최종 처리 결과:')
-        print(f'   - 성공: {result["success"]}개')
-        print(f'   - 실패: {result["failed"]}개') 
-        print(f'   - 전체: {result["total"]}개')
-        print(f'   - 성공률: {result["success_rate"]:.1f}%')
+        logger.info('최종 처리 결과:')
+        logger.info('- 성공: %s개', result["success"])
+        logger.info('- 실패: %s개', result["failed"])
+        logger.info('- 전체: %s개', result["total"])
+        logger.info('- 성공률: %.1f%%', result["success_rate"])
         
         # 저장된 리포트 요약 확인
-        generator.show_saved_reports_summary()
+        await generator.show_saved_reports_summary()
         
         # 단일 테스트용 (필요시 주석 해제)
         # org_id = 1
         # year = 2024
         # quarter = 3
-        # report = generator.generate_team_quarter_report(org_id, year, quarter)
+        # report = await generator.generate_team_quarter_report(org_id, year, quarter)
         # if report:
-        #     generator.save_team_report_to_mongodb(report)
-        #     print(f'✅ 테스트 리포트 저장 완료')
+        #     await generator.save_team_report_to_mongodb(report)
+        #     logger.info('[OK] 테스트 리포트 저장 완료')
         
     except Exception as e:
-        print(f'❌ 메인 처리 오류: {e}')
-        import traceback
-        traceback.print_exc()
+        logger.exception('[ERR] 메인 처리 오류: %s', e)
     finally:
-        generator.disconnect_databases()
+        await generator.disconnect_databases()
+        log_listener.stop()
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -1,105 +1,235 @@
 import os
+import json
+import logging
+import sys
+from pathlib import Path
 import asyncio
+import hashlib
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
-from collections import defaultdict, Counter
-import pymongo
-import pymysql
-from openai import OpenAI
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+import httpx
+import aiomysql
+import pandas as pd
+import bson
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from pymongo import AsyncMongoClient, UpdateOne
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 from dotenv import load_dotenv
 
+# 공용 모듈(app/common) 임포트 경로 추가
+_APP_DIR = str(Path(__file__).resolve().parents[2])
+if _APP_DIR not in sys.path:
+    sys.path.append(_APP_DIR)
+from common.logging_setup import setup_logging
+
 # 환경 변수 로드
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _Config:
+    """실행에 필요한 환경 변수 (모듈 로드 시 한 번만 읽음)"""
+    db_host: str
+    db_port: int
+    db_user: str
+    db_password: str
+    db_name: str
+    mongo_url: str
+    mongo_db_name: str
+    openai_api_key: str
+
+
+# 필수 환경 변수가 없으면 연결 시점이 아니라 모듈 로드 시점에 KeyError로 바로 실패
+CFG = _Config(
+    db_host=os.environ['DB_HOST'],
+    db_port=int(os.environ['DB_PORT']),
+    db_user=os.environ['DB_USER'],
+    db_password=os.environ['DB_PASSWORD'],
+    db_name=os.environ['DB_NAME'],
+    mongo_url=f"mongodb://{os.environ['MONGO_USER']}:{os.environ['MONGO_PASSWORD']}@{os.environ['MONGO_HOST']}:{os.environ['MONGO_PORT']}/{os.environ['MONGO_DB_NAME']}?authSource=admin",
+    mongo_db_name=os.environ['MONGO_DB_NAME'],
+    openai_api_key=os.environ['OPENAI_API_KEY']
+)
+
+# OpenAI 요청 rate limit을 고려한 동시 제언 생성 요청 수
+ANALYSIS_CONCURRENCY = 8
+
+# 조직별 user_ids GROUP_CONCAT 결과 최대 길이 (바이트)
+GROUP_CONCAT_MAX_LEN = 1048576
+
+# 이 행 수 미만의 키워드 집계는 pandas 대신 Counter로 처리
+PANDAS_MIN_ROWS = 50
+
+# 분기별 사용자 집계 aggregate 커서의 배치 크기
+AGGREGATE_BATCH_SIZE = 5000
+
+# 한 번의 OpenAI 요청에 묶어 보내는 조직-분기 제언 수
+RECOMMENDATION_BATCH_SIZE = 5
+RECOMMENDATION_MAX_TOKENS = 2000
+
+RECOMMENDATION_SYSTEM_PROMPT = '당신은 조직 문화 및 인사 관리 전문가입니다. 동료 평가에서 나타난 부정적 키워드를 분석하여 조직의 실질적인 개선 방안을 제시해주세요. 구체적이고 실행 가능한 솔루션을 중심으로 작성하되, 번호나 기호 없이 자연스러운 문단 형태로 작성해주세요.'
+
+# OpenAI 요청 기본 타임아웃(초)과 재시도 횟수 - 지연된 요청은 끊고 다시 보내 전체 실행을 막지 않도록 함
+OPENAI_TIMEOUT_SECONDS = 15.0
+# 요청별 타임아웃 = 기본 타임아웃 + max_tokens / 최소 예상 출력 속도(토큰/초), 긴 응답이 타임아웃-재시도로 반복 과금되지 않도록 함
+OPENAI_MIN_TOKENS_PER_SECOND = 25
+OPENAI_MAX_ATTEMPTS = 4
+OPENAI_MAX_CONNECTIONS = 32
+
+# 일시적인 오류(타임아웃/연결/429/5xx)만 지수 백오프 + 지터로 재시도
+openai_retry = retry(
+    stop=stop_after_attempt(OPENAI_MAX_ATTEMPTS),
+    wait=wait_random_exponential(multiplier=1, max=20),
+    retry=retry_if_exception_type((APITimeoutError, APIConnectionError, RateLimitError, InternalServerError)),
+    reraise=True
+)
+
+# OpenAI Batch API 상태 조회 간격 (지수 백오프, 초)
+BATCH_POLL_INITIAL_SECONDS = 30
+BATCH_POLL_MAX_SECONDS = 600
+# Batch API 작업 완료를 기다리는 최대 시간 (초과 시 취소 후 동기 요청으로 대체)
+BATCH_POLL_TIMEOUT_SECONDS = 2 * 60 * 60
+
+# 일괄 요청 시 TASK당 제언 길이 상한 (글자) - 묶은 응답이 RECOMMENDATION_MAX_TOKENS * TASK 수 안에 들어가도록 함
+BATCH_RECOMMENDATION_MAX_CHARS = 800
+
+BATCH_RECOMMENDATION_INSTRUCTION = """아래에 '=== TASK n ===' 으로 구분된 {count}개의 조직 분석 요청이 있습니다.
+각 TASK에 대해 독립적으로 개선 방안을 {max_chars}자 이내로 작성하고, TASK 순서 그대로 {count}개의 문자열을 담은 JSON 객체로만 응답해주세요.
+형식: {{"recommendations": ["TASK 1 제언", "TASK 2 제언", ...]}}
+"""
+
+def create_openai_client() -> AsyncOpenAI:
+    """keep-alive 커넥션 풀을 쓰는 AsyncOpenAI 클라이언트 생성"""
+    return AsyncOpenAI(
+        api_key=CFG.openai_api_key,
+        timeout=OPENAI_TIMEOUT_SECONDS,
+        max_retries=0,  # 재시도는 openai_retry에서 처리
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS, max_keepalive_connections=OPENAI_MAX_CONNECTIONS),
+            timeout=OPENAI_TIMEOUT_SECONDS
+        )
+    )
+
+
+# 모든 분석기 인스턴스가 공유하는 OpenAI 클라이언트 (TCP/TLS 연결 재사용)
+OPENAI_CLIENT = create_openai_client()
+
+
 class TeamNegativeKeywordAnalyzer:
-    def __init__(self):
-        self.maria_connection = None
+    def __init__(self, openai_client: Optional[AsyncOpenAI] = None):
+        self.maria_pool = None
         self.mongo_client = None
         self.mongo_db = None
-        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.openai_client = openai_client or OPENAI_CLIENT
         
     async def connect_databases(self):
         """데이터베이스 연결"""
         try:
-            # MariaDB 연결
-            self.maria_connection = pymysql.connect(
-                host=os.getenv('DB_HOST'),
-                port=int(os.getenv('DB_PORT')),
-                user=os.getenv('DB_USER'),
-                password=os.getenv('DB_PASSWORD'),
-                database=os.getenv('DB_NAME'),
-                charset='utf8mb4'
+            # MariaDB 커넥션 풀 생성
+            self.maria_pool = await aiomysql.create_pool(
+                host=CFG.db_host,
+                port=CFG.db_port,
+                user=CFG.db_user,
+                password=CFG.db_password,
+                db=CFG.db_name,
+                charset='utf8mb4',
+                minsize=1,
+                maxsize=5,
+                autocommit=True
             )
-            print('✅ MariaDB 연결 성공')
+            logger.info('✅ MariaDB 연결 성공')
             
             # MongoDB 연결
-            mongo_url = f"mongodb://{os.getenv('MONGO_USER')}:{os.getenv('MONGO_PASSWORD')}@{os.getenv('MONGO_HOST')}:{os.getenv('MONGO_PORT')}/{os.getenv('MONGO_DB_NAME')}?authSource=admin"
-            
-            self.mongo_client = pymongo.MongoClient(
-                mongo_url,
+            self.mongo_client = AsyncMongoClient(
+                CFG.mongo_url,
                 serverSelectionTimeoutMS=5000,
                 connectTimeoutMS=5000,
                 socketTimeoutMS=5000
             )
             
             # 연결 테스트
-            self.mongo_client.admin.command('ping')
-            self.mongo_db = self.mongo_client[os.getenv('MONGO_DB_NAME')]
-            print('✅ MongoDB 연결 성공')
+            await self.mongo_client.admin.command('ping')
+            self.mongo_db = self.mongo_client[CFG.mongo_db_name]
+            logger.info('✅ MongoDB 연결 성공')
             
         except Exception as e:
-            print(f'❌ 데이터베이스 연결 오류: {e}')
+            logger.error('❌ 데이터베이스 연결 오류: %s', e)
             raise e
+        
+        await self.ensure_indexes()
+    
+    async def ensure_indexes(self):
+        """조회 필터에 맞는 MongoDB 인덱스 생성 (이미 있으면 무시됨)"""
+        try:
+            peer_collection = self.mongo_db['peer_evaluation_results']
+            await peer_collection.create_index([
+                ('type', 1), ('evaluated_year', 1), ('evaluated_quarter', 1)
+            ])
+            # team_quarter 결과 upsert 필터용 (같은 컬렉션의 다른 type 문서에는 적용하지 않음)
+            await peer_collection.create_index(
+                [('type', 1), ('organization', 1), ('evaluated_year', 1), ('evaluated_quarter', 1)],
+                unique=True,
+                partialFilterExpression={'type': 'team_quarter'}
+            )
+            logger.info('✅ MongoDB 인덱스 확인 완료')
+        except Exception as e:
+            logger.warning('⚠️ MongoDB 인덱스 생성 실패 (조회는 계속 진행): %s', e)
     
-    def disconnect_databases(self):
+    async def disconnect_databases(self):
         """데이터베이스 연결 해제"""
         try:
-            if self.maria_connection:
-                self.maria_connection.close()
-                print('✅ MariaDB 연결 해제')
+            if self.maria_pool:
+                self.maria_pool.close()
+                await self.maria_pool.wait_closed()
+                self.maria_pool = None
+                logger.info('✅ MariaDB 연결 해제')
             if self.mongo_client:
-                self.mongo_client.close()
-                print('✅ MongoDB 연결 해제')
+                await self.mongo_client.close()
+                logger.info('✅ MongoDB 연결 해제')
         except Exception as e:
-            print(f'❌ 데이터베이스 연결 해제 오류: {e}')
+            logger.error('❌ 데이터베이스 연결 해제 오류: %s', e)
     
-    def get_user_organization_mapping(self) -> Dict[int, int]:
-        """사용자 ID와 조직 ID 매핑 조회"""
+    async def get_organization_users(self) -> Dict[int, List[int]]:
+        """조직 ID별 소속 사용자 ID 목록 조회 (그룹화는 MariaDB에서 처리)"""
         try:
-            with self.maria_connection.cursor(pymysql.cursors.DictCursor) as cursor:
+            async with self.maria_pool.acquire() as conn, conn.cursor(aiomysql.DictCursor) as cursor:
+                # 기본값(1024바이트)으로는 큰 조직의 user_ids가 잘리므로 세션 한도를 늘림
+                await cursor.execute(f"SET SESSION group_concat_max_len = {GROUP_CONCAT_MAX_LEN}")
                 query = """
-                    SELECT id as user_id, organization_id
+                    SELECT organization_id, GROUP_CONCAT(id ORDER BY id) AS user_ids
                     FROM users
                     WHERE organization_id IS NOT NULL
-                    ORDER BY organization_id, id
+                    GROUP BY organization_id
+                    ORDER BY organization_id
                 """
-                cursor.execute(query)
-                rows = cursor.fetchall()
-                
-            # user_id -> organization_id 매핑
-            user_org_mapping = {}
-            org_user_count = defaultdict(int)
+                await cursor.execute(query)
+                rows = await cursor.fetchall()
             
-            for row in rows:
-                user_id = row['user_id']
-                org_id = row['organization_id']
-                user_org_mapping[user_id] = org_id
-                org_user_count[org_id] += 1
+            org_users = {
+                row['organization_id']: [int(user_id) for user_id in row['user_ids'].split(',')]
+                for row in rows
+            }
             
-            print(f'👥 사용자-조직 매핑 조회 완료: {len(user_org_mapping)}명')
-            for org_id, count in org_user_count.items():
-                print(f"   조직 {org_id}: {count}명")
+            logger.info('👥 사용자-조직 매핑 조회 완료: %s명', sum(len(user_ids) for user_ids in org_users.values()))
+            for org_id, user_ids in org_users.items():
+                logger.debug('조직 %s: %s명', org_id, len(user_ids))
             
-            return user_org_mapping
+            return org_users
             
         except Exception as e:
-            print(f'❌ 사용자-조직 매핑 조회 오류: {e}')
+            logger.error('❌ 사용자-조직 매핑 조회 오류: %s', e)
             raise e
     
-    def get_organization_names(self) -> Dict[int, str]:
+    async def get_organization_names(self) -> Dict[int, str]:
         """조직 ID와 이름 매핑 조회"""
         try:
-            with self.maria_connection.cursor(pymysql.cursors.DictCursor) as cursor:
+            async with self.maria_pool.acquire() as conn, conn.cursor(aiomysql.DictCursor) as cursor:
                 query = """
                     SELECT division_id, name
                     FROM organizations
@@ -107,8 +237,8 @@ class TeamNegativeKeywordAnalyzer:
                     GROUP BY division_id, name
                     ORDER BY division_id
                 """
-                cursor.execute(query)
-                rows = cursor.fetchall()
+                await cursor.execute(query)
+                rows = await cursor.fetchall()
                 
             org_name_mapping = {}
             for row in rows:
@@ -116,106 +246,211 @@ class TeamNegativeKeywordAnalyzer:
                 org_name = row['name']
                 org_name_mapping[division_id] = org_name
             
-            print(f'🏢 조직 이름 매핑 조회 완료: {len(org_name_mapping)}개')
+            logger.info('🏢 조직 이름 매핑 조회 완료: %s개', len(org_name_mapping))
             for org_id, name in org_name_mapping.items():
-                print(f"   조직 {org_id}: {name}")
+                logger.debug('조직 %s: %s', org_id, name)
             
             return org_name_mapping
             
         except Exception as e:
-            print(f'❌ 조직 이름 매핑 조회 오류: {e}')
+            logger.error('❌ 조직 이름 매핑 조회 오류: %s', e)
             return {}
     
-    def get_peer_evaluation_results(self, user_ids: List[int], evaluated_year: int, evaluated_quarter: int) -> List[Dict]:
-        """특정 사용자들의 동료 평가 결과 조회"""
+    async def get_quarter_user_index(self, evaluated_year: int, evaluated_quarter: int, user_ids: List[int]) -> Dict[int, Dict]:
+        """해당 연도/분기 집계 문서에서 user_ids 중 부정적 키워드가 있는 사용자만 user_id 기준 dict로 인덱싱"""
         try:
-            peer_collection = self.mongo_db['peer_evaluation_results']
+            # 문서는 RawBSONDocument로 받아 users 디코딩을 스레드에서 처리 (이벤트 루프 블로킹 방지)
+            peer_collection = self.mongo_db['peer_evaluation_results'].with_options(
+                codec_options=CodecOptions(document_class=RawBSONDocument)
+            )
             
-            print(f"🔍 {evaluated_year}년 {evaluated_quarter}분기 집계 문서 조회...")
+            logger.info('🔍 %s년 %s분기 집계 문서 조회...', evaluated_year, evaluated_quarter)
             
-            # 해당 연도/분기의 집계 문서 조회
-            aggregate_doc = peer_collection.find_one({
-                'type': 'personal-quarter',
-                'evaluated_year': evaluated_year,
-                'evaluated_quarter': evaluated_quarter
-            })
+            # users 배열은 $filter 프로젝션으로 서버에서 걸러 필요한 사용자 서브문서만 전송
+            aggregate_doc = await peer_collection.find_one(
+                {
+                    'type': 'personal-quarter',
+                    'evaluated_year': evaluated_year,
+                    'evaluated_quarter': evaluated_quarter
+                },
+                projection={
+                    'users': {'$filter': {
+                        'input': '$users',
+                        'as': 'u',
+                        'cond': {'$and': [
+                            {'$in': ['$$u.user_id', user_ids]},
+                            {'$gt': [{'$size': {'$ifNull': ['$$u.keyword_summary.negative', []]}}, 0]}
+                        ]}
+                    }},
+                    'user_count': 1
+                }
+            )
             
             if not aggregate_doc:
-                print(f"❌ {evaluated_year}년 {evaluated_quarter}분기 집계 문서를 찾을 수 없습니다.")
-                return []
+                logger.error('❌ %s년 %s분기 집계 문서를 찾을 수 없습니다.', evaluated_year, evaluated_quarter)
+                return {}
+            
+            user_index = await asyncio.to_thread(self.index_raw_users, aggregate_doc)
+            
+            if not user_index:
+                logger.error('❌ %s년 %s분기 부정적 키워드가 있는 사용자 데이터를 찾을 수 없습니다.', evaluated_year, evaluated_quarter)
+                return {}
+            
+            logger.info('✅ 집계 문서 조회 완료: 부정적 키워드가 있는 사용자 %s명', len(user_index))
+            
+            return user_index
             
-            print(f"✅ 집계 문서 발견: {aggregate_doc.get('user_count', 0)}명의 사용자 데이터")
+        except Exception as e:
+            logger.error('❌ 동료 평가 집계 문서 조회 오류: %s', e)
+            raise e
+    
+    @staticmethod
+    def index_raw_users(raw_doc: RawBSONDocument) -> Dict[int, Dict]:
+        """RawBSONDocument의 users 서브문서를 디코딩해 user_id 기준 dict로 인덱싱"""
+        user_index = {}
+        for raw_user in raw_doc.get('users') or []:
+            user_data = bson.decode(raw_user.raw)
+            user_index[user_data['user_id']] = user_data
+        return user_index
+    
+    async def get_quarter_top_keywords(self, evaluated_year: int, evaluated_quarter: int, org_by_user: Dict[int, int], all_user_ids: List[int]) -> Dict[int, List[Dict]]:
+        """해당 연도/분기 조직별 상위 5개 부정적 키워드 집계 (조직 ID -> 키워드 목록)
+        
+        MongoDB에서 사용자별 키워드 합계까지 구하고, 조직 매핑과 상위 5개 선택은 Python dict 조회로 처리한다.
+        """
+        try:
+            peer_collection = self.mongo_db['peer_evaluation_results']
+            
+            logger.info('🔍 %s년 %s분기 조직별 부정적 키워드 집계...', evaluated_year, evaluated_quarter)
+            
+            pipeline = [
+                {'$match': {
+                    'type': 'personal-quarter',
+                    'evaluated_year': evaluated_year,
+                    'evaluated_quarter': evaluated_quarter
+                }},
+                {'$unwind': '$users'},
+                {'$match': {'users.user_id': {'$in': all_user_ids}}},
+                {'$unwind': '$users.keyword_summary.negative'},
+                {'$match': {'users.keyword_summary.negative.keyword': {'$nin': [None, '']}}},
+                {'$group': {
+                    '_id': {
+                        'user_id': '$users.user_id',
+                        'keyword': '$users.keyword_summary.negative.keyword'
+                    },
+                    'count': {'$sum': {'$ifNull': ['$users.keyword_summary.negative.count', 0]}}
+                }}
+            ]
             
-            # users 배열에서 해당 user_ids에 해당하는 사용자들만 필터링
-            all_users = aggregate_doc.get('users', [])
-            filtered_users = []
+            keyword_counts = defaultdict(Counter)
+            cursor = await peer_collection.aggregate(pipeline, batchSize=AGGREGATE_BATCH_SIZE, allowDiskUse=True)
+            async for doc in cursor:
+                keyword_counts[org_by_user[doc['_id']['user_id']]][doc['_id']['keyword']] += doc['count']
+            
+            # 횟수 내림차순, 동률이면 키워드 오름차순으로 조직별 상위 5개
+            quarter_keywords = {
+                org_id: [
+                    {'keyword': keyword, 'count': count}
+                    for keyword, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:5]
+                ]
+                for org_id, counts in keyword_counts.items()
+            }
+            
+            logger.info('✅ %s년 %s분기 부정적 키워드 집계 완료: %s개 조직', evaluated_year, evaluated_quarter, len(quarter_keywords))
+            
+            return quarter_keywords
             
-            for user_data in all_users:
-                user_id = user_data.get('user_id')
-                if user_id in user_ids:
-                    # keyword_summary.negative가 있는지 확인
-                    keyword_summary = user_data.get('keyword_summary', {})
-                    negative_keywords = keyword_summary.get('negative', [])
-                    
-                    if negative_keywords:  # 부정적 키워드가 있는 경우만
-                        filtered_users.append(user_data)
+        except Exception as e:
+            logger.error('❌ %s년 %s분기 부정적 키워드 집계 오류: %s', evaluated_year, evaluated_quarter, e)
+            raise e
+    
+    async def get_quarter_top_keywords_fallback(self, evaluated_year: int, evaluated_quarter: int, org_users: Dict[int, List[int]], all_user_ids: List[int]) -> Dict[int, List[Dict]]:
+        """파이프라인 집계를 쓸 수 없을 때 사용자 인덱스 조회 후 Python에서 조직별 상위 키워드 집계"""
+        user_index = await self.get_quarter_user_index(evaluated_year, evaluated_quarter, all_user_ids)
+        
+        quarter_keywords = {}
+        for org_id, user_ids in org_users.items():
+            peer_results = self.get_peer_evaluation_results(user_ids, user_index)
+            if peer_results:
+                quarter_keywords[org_id] = self.analyze_negative_keywords(peer_results)
+        
+        return quarter_keywords
+    
+    def get_peer_evaluation_results(self, user_ids: List[int], user_index: Dict[int, Dict]) -> List[Dict]:
+        """특정 사용자들의 동료 평가 결과 조회 (분기별 user_id 인덱스 사용)"""
+        try:
+            # user_ids 중 부정적 키워드가 있는 사용자만 필터링
+            filtered_users = [
+                user_index[user_id]
+                for user_id in user_ids
+                if user_id in user_index
+                and user_index[user_id].get('keyword_summary', {}).get('negative')
+            ]
             
-            print(f"📋 조건에 맞는 사용자 데이터: {len(filtered_users)}명")
+            logger.debug('📋 조건에 맞는 사용자 데이터: %s명', len(filtered_users))
             
             if filtered_users:
                 total_negative_keywords = sum(
                     len(user.get('keyword_summary', {}).get('negative', [])) 
                     for user in filtered_users
                 )
-                print(f"🔍 총 부정적 키워드 항목 수: {total_negative_keywords}개")
+                logger.debug('🔍 총 부정적 키워드 항목 수: %s개', total_negative_keywords)
             
             return filtered_users
             
         except Exception as e:
-            print(f'❌ 동료 평가 결과 조회 오류: {e}')
+            logger.error('❌ 동료 평가 결과 조회 오류: %s', e)
             raise e
     
     def analyze_negative_keywords(self, peer_results: List[Dict]) -> List[Dict]:
         """부정적 키워드 분석 및 상위 5개 추출"""
         try:
-            keyword_counter = Counter()
-            
-            # 모든 문서에서 부정적 키워드 수집
-            for result in peer_results:
-                negative_keywords = result.get('keyword_summary', {}).get('negative', [])
-                
-                for keyword_data in negative_keywords:
-                    if isinstance(keyword_data, dict):
-                        keyword = keyword_data.get('keyword', '')
-                        count = keyword_data.get('count', 0)
-                        if keyword:
-                            keyword_counter[keyword] += count
-            
-            # 상위 5개 키워드 추출
-            top_5_keywords = [
-                {'keyword': keyword, 'count': count}
-                for keyword, count in keyword_counter.most_common(5)
+            # 모든 문서에서 부정적 키워드를 (keyword, count) 행으로 평탄화
+            rows = [
+                (keyword_data['keyword'], keyword_data.get('count', 0))
+                for result in peer_results
+                for keyword_data in result.get('keyword_summary', {}).get('negative', [])
+                if isinstance(keyword_data, dict) and keyword_data.get('keyword')
             ]
             
-            print(f'🔍 부정적 키워드 분석 완료: 총 {len(keyword_counter)}개 키워드, 상위 5개 추출')
+            # 상위 5개 키워드 추출 (작은 입력은 Counter, 큰 입력은 pandas groupby로 합산)
+            if len(rows) < PANDAS_MIN_ROWS:
+                keyword_counter = Counter()
+                for keyword, count in rows:
+                    keyword_counter[keyword] += count
+                keyword_total = len(keyword_counter)
+                top_5_keywords = [
+                    {'keyword': keyword, 'count': count}
+                    for keyword, count in keyword_counter.most_common(5)
+                ]
+            else:
+                keyword_sums = pd.DataFrame(rows, columns=['keyword', 'count']).groupby('keyword', sort=False)['count'].sum()
+                keyword_total = len(keyword_sums)
+                top_5_keywords = [
+                    {'keyword': keyword, 'count': int(count)}
+                    for keyword, count in keyword_sums.nlargest(5).items()
+                ]
+            
+            logger.info('🔍 부정적 키워드 분석 완료: 총 %s개 키워드, 상위 5개 추출', keyword_total)
             for i, item in enumerate(top_5_keywords, 1):
-                print(f"   {i}. {item['keyword']}: {item['count']}회")
+                logger.debug('%s. %s: %s회', i, item['keyword'], item['count'])
             
             return top_5_keywords
             
         except Exception as e:
-            print(f'❌ 부정적 키워드 분석 오류: {e}')
+            logger.error('❌ 부정적 키워드 분석 오류: %s', e)
             raise e
     
-    async def generate_improvement_recommendations(self, org_name: str, top_keywords: List[Dict], evaluated_year: int, evaluated_quarter: int) -> str:
-        """GPT-4o를 사용한 개선 제언 생성"""
-        try:
-            if not top_keywords:
-                return "분석할 부정적 키워드가 없어 제언을 생성할 수 없습니다."
-            
-            keywords_text = ', '.join([f"{item['keyword']}({item['count']}회)" for item in top_keywords])
-            
-            prompt = f"""
+    @openai_retry
+    async def create_chat_completion(self, **kwargs):
+        """max_tokens에 비례한 타임아웃/재시도가 적용된 chat completion 요청"""
+        timeout = OPENAI_TIMEOUT_SECONDS + kwargs.get('max_tokens', 0) / OPENAI_MIN_TOKENS_PER_SECOND
+        return await self.openai_client.with_options(timeout=timeout).chat.completions.create(**kwargs)
+    
+    @staticmethod
+    def build_recommendation_prompt(org_name: str, top_keywords: List[Dict], evaluated_year: int, evaluated_quarter: int) -> str:
+        """조직-분기 개선 제언 프롬프트 생성"""
+        return f"""
 {org_name} 조직의 {evaluated_year}년 {evaluated_quarter}분기 동료 평가에서 나타난 주요 부정적 키워드 분석 결과입니다.
 
 상위 5개 부정적 키워드:
@@ -227,15 +462,23 @@ class TeamNegativeKeywordAnalyzer:
 
 번호나 기호 없이 자연스러운 문단 형태의 일반 텍스트로만 작성해주세요.
             """
+    
+    async def generate_improvement_recommendations(self, org_name: str, top_keywords: List[Dict], evaluated_year: int, evaluated_quarter: int) -> str:
+        """GPT-4o를 사용한 개선 제언 생성"""
+        try:
+            if not top_keywords:
+                return "분석할 부정적 키워드가 없어 제언을 생성할 수 없습니다."
             
-            print(f'🤖 {org_name} 조직 개선 제언 생성 중...')
+            prompt = self.build_recommendation_prompt(org_name, top_keywords, evaluated_year, evaluated_quarter)
             
-            response = self.openai_client.chat.completions.create(
+            logger.info('🤖 %s 조직 개선 제언 생성 중...', org_name)
+            
+            response = await self.create_chat_completion(
                 model='gpt-4o',
                 messages=[
                     {
                         'role': 'system',
-                        'content': '당신은 조직 문화 및 인사 관리 전문가입니다. 동료 평가에서 나타난 부정적 키워드를 분석하여 조직의 실질적인 개선 방안을 제시해주세요. 구체적이고 실행 가능한 솔루션을 중심으로 작성하되, 번호나 기호 없이 자연스러운 문단 형태로 작성해주세요.'
+                        'content': RECOMMENDATION_SYSTEM_PROMPT
                     },
                     {
                         'role': 'user',
@@ -243,155 +486,396 @@ class TeamNegativeKeywordAnalyzer:
                     }
                 ],
                 temperature=0.7,
-                max_tokens=2000
+                max_tokens=RECOMMENDATION_MAX_TOKENS
             )
             
             recommendations = response.choices[0].message.content
-            print(f'✅ {org_name} 조직 개선 제언 생성 완료')
+            logger.info('✅ %s 조직 개선 제언 생성 완료', org_name)
             
             return recommendations
             
         except Exception as e:
-            print(f'❌ {org_name} 조직 개선 제언 생성 오류: {e}')
+            logger.error('❌ %s 조직 개선 제언 생성 오류: %s', org_name, e)
             raise e
     
-    def save_team_quarter_analysis(self, data: Dict) -> bool:
-        """팀 분기별 분석 결과 저장"""
+    async def generate_batched_recommendations(self, jobs: List[Tuple[str, List[Dict], int, int]]) -> List[str]:
+        """여러 조직-분기의 개선 제언을 한 번의 GPT-4o 요청으로 생성 (jobs 순서대로 반환)
+        
+        응답이 max_tokens에서 잘리면(finish_reason == 'length') 배치를 반으로 나눠 다시 요청한다.
+        """
         try:
-            collection = self.mongo_db['peer_evaluation_results']
-            
-            document = {
-                'type': 'team_quarter',
-                'organization': data['organization_id'],
-                'organization_name': data.get('organization_name', ''),
-                'evaluated_year': data['evaluated_year'],
-                'evaluated_quarter': data['evaluated_quarter'],
-                'analysis_summary': {
-                    'total_members_analyzed': data['total_members'],
-                    'total_negative_keywords': len(data['top_keywords']),
-                    'total_mentions': sum(item['count'] for item in data['top_keywords'])
-                },
-                'top_negative_keywords': data['top_keywords'],
-                'improvement_recommendations': data['recommendations'],
-                'created_at': datetime.now(),
-                'updated_at': datetime.now()
-            }
+            tasks_text = '\n'.join(
+                f"=== TASK {i} ===\n{self.build_recommendation_prompt(org_name, top_keywords, evaluated_year, evaluated_quarter)}"
+                for i, (org_name, top_keywords, evaluated_year, evaluated_quarter) in enumerate(jobs, 1)
+            )
             
-            # 기존 데이터가 있으면 업데이트, 없으면 삽입
-            filter_query = {
-                'type': 'team_quarter',
-                'organization': data['organization_id'],
-                'evaluated_year': data['evaluated_year'],
-                'evaluated_quarter': data['evaluated_quarter']
-            }
+            logger.info('🤖 %s개 조직-분기 개선 제언 일괄 생성 중...', len(jobs))
             
-            result = collection.replace_one(filter_query, document, upsert=True)
+            response = await self.create_chat_completion(
+                model='gpt-4o',
+                messages=[
+                    {
+                        'role': 'system',
+                        'content': RECOMMENDATION_SYSTEM_PROMPT
+                    },
+                    {
+                        'role': 'user',
+                        'content': BATCH_RECOMMENDATION_INSTRUCTION.format(
+                            count=len(jobs), max_chars=BATCH_RECOMMENDATION_MAX_CHARS
+                        ) + tasks_text
+                    }
+                ],
+                temperature=0.7,
+                max_tokens=RECOMMENDATION_MAX_TOKENS * len(jobs),
+                response_format={'type': 'json_object'}
+            )
             
-            if result.upserted_id:
-                print(f'✅ 조직 {data["organization_id"]} 팀 분기 분석 결과 신규 저장')
+            choice = response.choices[0]
+            if choice.finish_reason == 'length':
+                if len(jobs) == 1:
+                    raise ValueError('응답이 max_tokens에서 잘렸습니다.')
+                truncated = True
             else:
-                print(f'✅ 조직 {data["organization_id"]} 팀 분기 분석 결과 업데이트 완료')
-            
-            return True
+                truncated = False
+                recommendations = json.loads(choice.message.content).get('recommendations')
+                if not isinstance(recommendations, list) or len(recommendations) != len(jobs):
+                    raise ValueError(f'요청 {len(jobs)}개와 응답 제언 수가 일치하지 않습니다.')
             
         except Exception as e:
-            print(f'❌ 조직 {data["organization_id"]} 팀 분기 분석 결과 저장 오류: {e}')
-            return False
+            logger.error('❌ 개선 제언 일괄 생성 오류: %s', e)
+            raise e
+        
+        if truncated:
+            # 잘린 JSON은 파싱할 수 없으므로 전체 단건 폴백 대신 절반씩 다시 요청
+            mid = len(jobs) // 2
+            logger.warning('⚠️ %s개 일괄 제언 응답이 잘려 %s개 + %s개로 나눠 재요청합니다.', len(jobs), mid, len(jobs) - mid)
+            return (await self.generate_batched_recommendations(jobs[:mid])
+                    + await self.generate_batched_recommendations(jobs[mid:]))
+        
+        logger.info('✅ %s개 조직-분기 개선 제언 일괄 생성 완료', len(jobs))
+        
+        return [str(text) for text in recommendations]
     
-    async def analyze_organization_quarter(self, org_id: int, org_name: str, user_ids: List[int], evaluated_year: int, evaluated_quarter: int) -> bool:
-        """특정 조직의 특정 분기 분석"""
+    async def generate_recommendations_via_batch_api(self, jobs: List[Dict]) -> Dict[str, str]:
+        """OpenAI Batch API로 조직-분기 개선 제언 일괄 생성 (custom_id -> 제언)"""
         try:
-            print(f'\n🔄 {org_name} 조직 {evaluated_year}년 {evaluated_quarter}분기 분석 시작 ({len(user_ids)}명)')
-            
-            # 1. 동료 평가 결과 조회
-            peer_results = self.get_peer_evaluation_results(user_ids, evaluated_year, evaluated_quarter)
+            lines = [
+                json.dumps({
+                    'custom_id': f"{job['organization_id']}-{job['evaluated_quarter']}",
+                    'method': 'POST',
+                    'url': '/v1/chat/completions',
+                    'body': {
+                        'model': 'gpt-4o',
+                        'messages': [
+                            {'role': 'system', 'content': RECOMMENDATION_SYSTEM_PROMPT},
+                            {'role': 'user', 'content': self.build_recommendation_prompt(
+                                job['organization_name'], job['top_keywords'],
+                                job['evaluated_year'], job['evaluated_quarter']
+                            )}
+                        ],
+                        'temperature': 0.7,
+                        'max_tokens': RECOMMENDATION_MAX_TOKENS
+                    }
+                }, ensure_ascii=False)
+                for job in jobs
+            ]
             
-            if not peer_results:
-                print(f'⚠️ {org_name} 조직 {evaluated_quarter}분기 동료 평가 데이터가 없습니다.')
-                return False
+            input_file = await self.openai_client.files.create(
+                file=('team_negative_recommendations.jsonl', '\n'.join(lines).encode('utf-8')),
+                purpose='batch'
+            )
+            batch = await self.openai_client.batches.create(
+                input_file_id=input_file.id,
+                endpoint='/v1/chat/completions',
+                completion_window='24h'
+            )
+            logger.info('📤 Batch API 작업 생성: %s (%s건)', batch.id, len(jobs))
+            
+            # 완료될 때까지 지수 백오프로 상태 조회 (전체 대기 시간 상한 초과 시 작업 취소)
+            delay = BATCH_POLL_INITIAL_SECONDS
+            deadline = asyncio.get_running_loop().time() + BATCH_POLL_TIMEOUT_SECONDS
+            while batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+                if asyncio.get_running_loop().time() >= deadline:
+                    await self.openai_client.batches.cancel(batch.id)
+                    raise TimeoutError(f'Batch API 작업 {batch.id}이 {BATCH_POLL_TIMEOUT_SECONDS}초 안에 끝나지 않아 취소했습니다.')
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, BATCH_POLL_MAX_SECONDS)
+                batch = await self.openai_client.batches.retrieve(batch.id)
+                logger.info('⏳ Batch API 작업 상태: %s', batch.status)
+            
+            if batch.status != 'completed' or not batch.output_file_id:
+                raise RuntimeError(f'Batch API 작업 {batch.id} 실패: {batch.status}')
+            
+            recommendations = {}
+            output = (await self.openai_client.files.content(batch.output_file_id)).text
+            for line in output.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                response = item.get('response') or {}
+                if item.get('error') or response.get('status_code') != 200:
+                    logger.warning('⚠️ Batch API 요청 %s 실패: %s', item.get('custom_id'), item.get('error'))
+                    continue
+                recommendations[item['custom_id']] = response['body']['choices'][0]['message']['content']
+            
+            logger.info('✅ Batch API 개선 제언 수신 완료: %s/%s건', len(recommendations), len(jobs))
             
-            # 2. 부정적 키워드 분석
-            top_keywords = self.analyze_negative_keywords(peer_results)
+            return recommendations
             
-            if not top_keywords:
-                print(f'⚠️ {org_name} 조직 {evaluated_quarter}분기 부정적 키워드가 없습니다.')
-                return False
+        except Exception as e:
+            logger.error('❌ Batch API 개선 제언 생성 오류: %s', e)
+            raise e
+    
+    @staticmethod
+    def recommendation_cache_key(job: Dict) -> str:
+        """조직명/연도/분기/상위 키워드로 만든 개선 제언 캐시 키"""
+        payload = json.dumps({
+            'o': job['organization_name'],
+            'y': job['evaluated_year'],
+            'q': job['evaluated_quarter'],
+            'k': job['top_keywords']
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    async def get_cached_recommendations(self, keys: List[str]) -> Dict[str, str]:
+        """캐시 키 목록에 해당하는 저장된 개선 제언을 한 번에 조회 (캐시 키 -> 제언)"""
+        if not keys:
+            return {}
+        
+        try:
+            collection = self.mongo_db['team_recommendation_cache']
+            cursor = collection.find({'_id': {'$in': list(set(keys))}}, {'text': 1})
+            return {doc['_id']: doc['text'] async for doc in cursor}
+        except Exception as e:
+            logger.warning('⚠️ 개선 제언 캐시 조회 실패 (전체 신규 생성): %s', e)
+            return {}
+    
+    async def cache_recommendations(self, recommendations: Dict[str, str]):
+        """새로 생성한 개선 제언을 캐시 컬렉션에 저장 (이미 있는 키는 유지)"""
+        if not recommendations:
+            return
+        
+        try:
+            collection = self.mongo_db['team_recommendation_cache']
+            now = datetime.now()
+            await collection.bulk_write([
+                UpdateOne({'_id': key}, {'$setOnInsert': {'text': text, 'ts': now}}, upsert=True)
+                for key, text in recommendations.items()
+            ], ordered=False)
+        except Exception as e:
+            logger.warning('⚠️ 개선 제언 캐시 저장 실패: %s', e)
+    
+    @staticmethod
+    def build_team_quarter_update(data: Dict, now: datetime) -> UpdateOne:
+        """팀 분기별 분석 결과 upsert 작업 생성 (기존 문서의 created_at은 유지)"""
+        document = {
+            'type': 'team_quarter',
+            'organization': data['organization_id'],
+            'organization_name': data.get('organization_name', ''),
+            'evaluated_year': data['evaluated_year'],
+            'evaluated_quarter': data['evaluated_quarter'],
+            'analysis_summary': {
+                'total_members_analyzed': data['total_members'],
+                'total_negative_keywords': len(data['top_keywords']),
+                'total_mentions': sum(item['count'] for item in data['top_keywords'])
+            },
+            'top_negative_keywords': data['top_keywords'],
+            'improvement_recommendations': data['recommendations'],
+            'updated_at': now
+        }
+        
+        # 기존 데이터가 있으면 업데이트, 없으면 삽입
+        filter_query = {
+            'type': 'team_quarter',
+            'organization': data['organization_id'],
+            'evaluated_year': data['evaluated_year'],
+            'evaluated_quarter': data['evaluated_quarter']
+        }
+        
+        return UpdateOne(
+            filter_query,
+            {'$set': document, '$setOnInsert': {'created_at': now}},
+            upsert=True
+        )
+    
+    async def save_many(self, docs: List[Dict]) -> bool:
+        """팀 분기별 분석 결과를 unordered bulk_write 한 번으로 일괄 저장"""
+        if not docs:
+            return True
+        
+        try:
+            collection = self.mongo_db['peer_evaluation_results']
+            now = datetime.now()
             
-            # 3. GPT 개선 제언 생성
-            recommendations = await self.generate_improvement_recommendations(
-                org_name, top_keywords, evaluated_year, evaluated_quarter
+            result = await collection.bulk_write(
+                [self.build_team_quarter_update(data, now) for data in docs],
+                ordered=False
             )
             
-            # 4. 결과 저장
-            save_result = self.save_team_quarter_analysis({
-                'organization_id': org_id,
-                'organization_name': org_name,
-                'evaluated_year': evaluated_year,
-                'evaluated_quarter': evaluated_quarter,
-                'total_members': len(user_ids),
-                'top_keywords': top_keywords,
-                'recommendations': recommendations
-            })
-            
-            if save_result:
-                print(f'✅ {org_name} 조직 {evaluated_quarter}분기 분석 완료')
-                return True
-            else:
-                print(f'❌ {org_name} 조직 {evaluated_quarter}분기 저장 실패')
-                return False
+            logger.info('✅ 팀 분기 분석 결과 일괄 저장 완료: 신규 %s개, 업데이트 %s개', result.upserted_count, result.modified_count)
+            
+            return True
             
         except Exception as e:
-            print(f'❌ {org_name} 조직 {evaluated_quarter}분기 분석 오류: {e}')
+            logger.error('❌ 팀 분기 분석 결과 일괄 저장 오류: %s', e)
             return False
     
-    async def analyze_all_organizations_quarters(self, evaluated_year: int):
-        """모든 조직의 모든 분기 분석 (None 분기 제외)"""
+    async def save_team_quarter_analysis(self, data: Dict) -> bool:
+        """팀 분기별 분석 결과 저장"""
+        return await self.save_many([data])
+    
+    def prepare_organization_quarter(self, org_id: int, org_name: str, user_ids: List[int], evaluated_year: int, evaluated_quarter: int, top_keywords: List[Dict]) -> Optional[Dict]:
+        """특정 조직의 특정 분기 키워드 분석 결과 정리 (제언 생성 전 단계)"""
+        logger.debug('🔄 %s 조직 %s년 %s분기 분석 시작 (%s명)', org_name, evaluated_year, evaluated_quarter, len(user_ids))
+        
+        if not top_keywords:
+            logger.warning('⚠️ %s 조직 %s분기 부정적 키워드가 없습니다.', org_name, evaluated_quarter)
+            return None
+        
+        for i, item in enumerate(top_keywords, 1):
+            logger.debug('%s. %s: %s회', i, item['keyword'], item['count'])
+        
+        return {
+            'organization_id': org_id,
+            'organization_name': org_name,
+            'evaluated_year': evaluated_year,
+            'evaluated_quarter': evaluated_quarter,
+            'total_members': len(user_ids),
+            'top_keywords': top_keywords
+        }
+    
+    async def recommend_organization_quarters(self, jobs: List[Dict]) -> List[Optional[str]]:
+        """키워드 분석이 끝난 조직-분기 묶음의 GPT 개선 제언 생성 (실패 항목은 None)"""
+        try:
+            return await self.generate_batched_recommendations([
+                (job['organization_name'], job['top_keywords'], job['evaluated_year'], job['evaluated_quarter'])
+                for job in jobs
+            ])
+        except Exception:
+            # 일괄 응답을 쓸 수 없으면 조직-분기별 개별 요청으로 대체
+            logger.warning('⚠️ 일괄 제언 생성 실패, %s개 조직-분기를 개별 요청으로 재시도합니다.', len(jobs))
+            recommendations = await asyncio.gather(*(
+                self.generate_improvement_recommendations(
+                    job['organization_name'], job['top_keywords'], job['evaluated_year'], job['evaluated_quarter']
+                )
+                for job in jobs
+            ), return_exceptions=True)
+            return [None if isinstance(text, Exception) else text for text in recommendations]
+    
+    async def recommend_pending_jobs(self, jobs: List[Dict]) -> List[Optional[str]]:
+        """조직-분기 제언을 RECOMMENDATION_BATCH_SIZE개씩 묶어 동시 생성 (jobs 순서대로, 실패 항목은 None)"""
+        semaphore = asyncio.Semaphore(ANALYSIS_CONCURRENCY)
+        
+        async def run(batch: List[Dict]) -> List[Optional[str]]:
+            async with semaphore:
+                return await self.recommend_organization_quarters(batch)
+        
+        batch_results = await asyncio.gather(*(
+            run(jobs[i:i + RECOMMENDATION_BATCH_SIZE])
+            for i in range(0, len(jobs), RECOMMENDATION_BATCH_SIZE)
+        ))
+        return [text for batch in batch_results for text in batch]
+    
+    async def analyze_all_organizations_quarters(self, evaluated_year: int, use_batch_api: bool = False):
+        """모든 조직의 모든 분기 분석 (None 분기 제외, use_batch_api면 OpenAI Batch API 사용)"""
         try:
-            print(f'\n🚀 {evaluated_year}년 팀 단위 부정적 키워드 분석 시작')
+            logger.info('🚀 %s년 팀 단위 부정적 키워드 분석 시작', evaluated_year)
             
             await self.connect_databases()
             
-            # 1. 사용자-조직 매핑 조회
-            user_org_mapping = self.get_user_organization_mapping()
-            
-            # 2. 조직 이름 매핑 조회
-            org_name_mapping = self.get_organization_names()
-            
-            # 3. 조직별 사용자 그룹화
-            org_users = defaultdict(list)
-            for user_id, org_id in user_org_mapping.items():
-                org_users[org_id].append(user_id)
-            
-            success_count = 0
-            fail_count = 0
+            # 1~3. 조직별 사용자 목록과 조직 이름 매핑을 동시에 조회
+            org_users, org_name_mapping = await asyncio.gather(
+                self.get_organization_users(),
+                self.get_organization_names()
+            )
             
-            # 4. 각 조직별, 분기별 분석 (None 분기 제외)
+            # 4. 분기별 조직 상위 부정적 키워드를 MongoDB에서 집계 (실패 시 Python 집계로 대체)
+            all_user_ids = [user_id for user_ids in org_users.values() for user_id in user_ids]
+            org_by_user = {user_id: org_id for org_id, user_ids in org_users.items() for user_id in user_ids}
+            try:
+                quarter_results = await asyncio.gather(*(
+                    self.get_quarter_top_keywords(evaluated_year, quarter, org_by_user, all_user_ids)
+                    for quarter in [1, 2, 3, 4]
+                ))
+            except Exception:
+                logger.warning('⚠️ 파이프라인 키워드 집계 실패, Python 집계로 재시도합니다.')
+                quarter_results = await asyncio.gather(*(
+                    self.get_quarter_top_keywords_fallback(evaluated_year, quarter, org_users, all_user_ids)
+                    for quarter in [1, 2, 3, 4]
+                ))
+            quarter_keywords = dict(zip([1, 2, 3, 4], quarter_results))
+            
+            # 5. 각 조직별, 분기별 키워드 분석 (1-4분기만 처리, None 분기 제외)
+            jobs = []
             for org_id, user_ids in org_users.items():
                 org_name = org_name_mapping.get(org_id, f'조직{org_id}')
-                
-                # 1-4분기만 처리 (None 분기 제외)
                 for quarter in [1, 2, 3, 4]:
-                    result = await self.analyze_organization_quarter(
-                        org_id, org_name, user_ids, evaluated_year, quarter
+                    job = self.prepare_organization_quarter(
+                        org_id, org_name, user_ids, evaluated_year, quarter,
+                        quarter_keywords[quarter].get(org_id, [])
                     )
-                    
-                    if result:
-                        success_count += 1
-                    else:
-                        fail_count += 1
-                    
-                    # API 호출 제한 고려 지연
-                    await asyncio.sleep(1)
-            
-            print(f'\n🎉 팀 단위 부정적 키워드 분석 완료!')
-            print(f'✅ 성공: {success_count}개 조직-분기')
-            print(f'❌ 실패: {fail_count}개 조직-분기')
+                    if job:
+                        jobs.append(job)
+            
+            # 6. 캐시된 제언 조회 - 같은 키(조직명/연도/분기/키워드)는 한 번만 생성
+            job_keys = [self.recommendation_cache_key(job) for job in jobs]
+            cached = await self.get_cached_recommendations(job_keys)
+            # 같은 키의 조직-분기는 대표 작업 하나만 생성하고 결과를 공유 (저장은 조직별로 따로)
+            pending = {}
+            cache_hits = 0
+            for key, job in zip(job_keys, jobs):
+                if key in cached:
+                    cache_hits += 1
+                elif key not in pending:
+                    pending[key] = job
+            pending_jobs = list(pending.values())
+            logger.info(
+                '💾 제언 캐시 적중: %s개, 중복 작업 공유: %s개, 신규 생성 대상: %s개',
+                cache_hits, len(jobs) - cache_hits - len(pending_jobs), len(pending_jobs)
+            )
+            
+            generated = None
+            if use_batch_api and pending_jobs:
+                # 7. 오프라인 실행: 전체 조직-분기를 Batch API 작업 하나로 제출
+                try:
+                    recommendations_by_id = await self.generate_recommendations_via_batch_api(pending_jobs)
+                    generated = [
+                        recommendations_by_id.get(f"{job['organization_id']}-{job['evaluated_quarter']}")
+                        for job in pending_jobs
+                    ]
+                except Exception:
+                    # 배치 실패/만료/취소/시간 초과 시 키워드 분석 결과를 버리지 않고 동기 요청으로 대체
+                    logger.warning('⚠️ Batch API 제언 생성 실패, %s개 조직-분기를 동기 요청으로 생성합니다.', len(pending_jobs))
+            if generated is None:
+                # 7. 여러 조직-분기를 묶어 제언 생성 - 세마포어로 동시 요청 수 제한
+                generated = await self.recommend_pending_jobs(pending_jobs)
+            
+            generated_by_key = {
+                key: text for key, text in zip(pending, generated) if text is not None
+            }
+            await self.cache_recommendations(generated_by_key)
+            recommendations = [cached.get(key) or generated_by_key.get(key) for key in job_keys]
+            
+            # 8. 제언이 생성된 조직-분기를 한 번의 bulk_write로 저장
+            completed = []
+            for job, recommendation in zip(jobs, recommendations):
+                if recommendation is None:
+                    logger.error('❌ %s 조직 %s분기 개선 제언 생성 실패', job['organization_name'], job['evaluated_quarter'])
+                    continue
+                completed.append({**job, 'recommendations': recommendation})
+            
+            success_count = len(completed) if await self.save_many(completed) else 0
+            fail_count = len(org_users) * 4 - success_count
+            
+            logger.info('🎉 팀 단위 부정적 키워드 분석 완료!')
+            logger.info('✅ 성공: %s개 조직-분기', success_count)
+            logger.info('❌ 실패: %s개 조직-분기', fail_count)
             
         except Exception as e:
-            print(f'❌ 전체 분석 처리 오류: {e}')
+            logger.error('❌ 전체 분석 처리 오류: %s', e)
             raise e
         finally:
-            self.disconnect_databases()
+            await self.disconnect_databases()
 
 
 # 사용 예시 및 실행부
@@ -399,19 +883,22 @@ async def main():
     analyzer = TeamNegativeKeywordAnalyzer()
     
     try:
-        # 2024년 전체 조직 분석
-        await analyzer.analyze_all_organizations_quarters(2024)
+        # 2024년 전체 조직 분석 (지연 허용 배치 작업이므로 Batch API 사용)
+        await analyzer.analyze_all_organizations_quarters(2024, use_batch_api=True)
         
     except Exception as e:
-        print(f'❌ 메인 처리 오류: {e}')
+        logger.error('❌ 메인 처리 오류: %s', e)
         exit(1)
 
 
 if __name__ == '__main__':
+    log_listener = setup_logging()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("\n⚠️ 사용자에 의해 중단됨")
+        logger.warning('⚠️ 사용자에 의해 중단됨')
     except Exception as e:
-        print(f"❌ 실행 오류: {e}")
-        exit(1)
\ No newline at end of file
+        logger.error('❌ 실행 오류: %s', e)
+        exit(1)
+    finally:
+        log_listener.stop()
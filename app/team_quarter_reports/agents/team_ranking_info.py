@@ -1,32 +1,43 @@
 import os
+import sys
+from pathlib import Path
 import pymongo
 import pymysql
 from dotenv import load_dotenv
 from datetime import datetime
-from typing import Dict, List, Optional
-import json
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
+
+# 공용 모듈(app/common) 임포트 경로 추가
+_APP_DIR = str(Path(__file__).resolve().parents[2])
+if _APP_DIR not in sys.path:
+    sys.path.append(_APP_DIR)
+from common.db import connect_maria
 
 # 환경 변수 로드
 load_dotenv()
 
+# 동료평가 긍정 키워드가 없는 사용자의 기본값 (읽기 전용으로 공유)
+NO_PEER_KEYWORDS = ['키워드없음']
+
+# 분기별 처리 동시 실행 스레드 수 (MongoClient maxPoolSize 이하)
+QUARTER_MAX_WORKERS = 8
+
 class CompleteTeamAnalysisSystem:
     def __init__(self):
         self.maria_connection = None
         self.mongo_client = None
         self.mongo_db = None
+        # (연도, 분기) -> {user_id: 긍정 키워드 상위 3개} 동료평가 캐시
+        self._peer_cache: Dict[Tuple[int, int], Dict[int, List[str]]] = {}
         
     def connect_databases(self):
         """데이터베이스 연결"""
         try:
             # MariaDB 연결
-            self.maria_connection = pymysql.connect(
-                host=os.getenv('DB_HOST'),
-                port=int(os.getenv('DB_PORT')),
-                user=os.getenv('DB_USER'),
-                password=os.getenv('DB_PASSWORD'),
-                database=os.getenv('DB_NAME'),
-                charset='utf8mb4'
-            )
+            self.maria_connection = connect_maria()
             print('✅ MariaDB 연결 성공')
             
             # MongoDB 연결
@@ -37,6 +48,20 @@ class CompleteTeamAnalysisSystem:
             self.mongo_db = self.mongo_client[os.getenv('MONGO_DB_NAME')]
             print('✅ MongoDB 연결 성공')
             
+            # 분기 문서 조회/업서트 필터용 인덱스
+            self.mongo_db['ranking_results'].create_index(
+                [('type', 1), ('evaluated_year', 1), ('evaluated_quarter', 1)]
+            )
+            # 팀 랭킹 문서만 대상 (personal-quarter 문서에는 organization_id가 없음)
+            self.mongo_db['ranking_results'].create_index(
+                [('type', 1), ('organization_id', 1), ('evaluated_year', 1), ('evaluated_quarter', 1)],
+                unique=True,
+                partialFilterExpression={'organization_id': {'$exists': True}}
+            )
+            self.mongo_db['peer_evaluation_results'].create_index(
+                [('type', 1), ('evaluated_year', 1), ('evaluated_quarter', 1)]
+            )
+            
         except Exception as e:
             print(f'❌ 데이터베이스 연결 오류: {e}')
             raise e
@@ -71,6 +96,35 @@ class CompleteTeamAnalysisSystem:
             print(f'❌ 사용자 매핑 생성 오류: {e}')
             return {}
     
+    def get_user_org_job_info(self) -> Tuple[Dict[int, Dict], Dict[int, str], Counter]:
+        """사용자/직군/조직 정보를 한 번의 쿼리로 조회해 사용자 매핑, 조직 이름, 조직별 인원 수 생성"""
+        try:
+            with self.maria_connection.cursor(pymysql.cursors.DictCursor) as cursor:
+                query = """
+                    SELECT u.id, u.name, u.organization_id, u.job_id, j.name as job_name, o.name as org_name
+                    FROM users u
+                    LEFT JOIN jobs j ON u.job_id = j.id
+                    LEFT JOIN organizations o ON u.organization_id = o.division_id
+                    WHERE u.organization_id IS NOT NULL
+                    ORDER BY u.organization_id, u.id
+                """
+                cursor.execute(query)
+                rows = cursor.fetchall()
+            
+            user_mapping = {row['id']: row for row in rows}
+            org_name_mapping = {row['organization_id']: row['org_name'] for row in rows if row['org_name']}
+            org_counts = Counter(user['organization_id'] for user in user_mapping.values())
+            
+            print(f'✅ 사용자/조직 정보 조회 완료: {len(user_mapping)}명, {len(org_counts)}개 조직')
+            return user_mapping, org_name_mapping, org_counts
+            
+        except Exception as e:
+            # organizations 테이블이 없는 환경 등은 개별 조회(기본 조직명 포함)로 대체
+            print(f'⚠️ 사용자/조직 통합 조회 실패, 개별 조회로 대체: {e}')
+            user_mapping = self.get_user_job_mapping()
+            org_counts = Counter(user['organization_id'] for user in user_mapping.values())
+            return user_mapping, self.get_organization_names(), org_counts
+    
     def get_organization_names(self) -> Dict[int, str]:
         """조직 ID별 이름 매핑"""
         try:
@@ -95,67 +149,92 @@ class CompleteTeamAnalysisSystem:
             print(f'❌ 조직 이름 매핑 오류: {e}')
             return {}
     
-    def get_peer_keywords(self, user_id: int, year: int, quarter: int) -> List[str]:
-        """특정 사용자의 동료평가 긍정 키워드 상위 3개 가져오기"""
+    def _load_peer_index(self, year: int, quarter: int) -> Dict[int, List[str]]:
+        """해당 분기 동료평가 문서를 한 번만 조회해 사용자별 긍정 키워드 상위 3개 인덱스 생성"""
+        cache_key = (year, quarter)
+        if cache_key in self._peer_cache:
+            return self._peer_cache[cache_key]
+        
+        peer_index = {}
         try:
             peer_collection = self.mongo_db['peer_evaluation_results']
             
-            # 해당 분기 문서 조회
-            peer_doc = peer_collection.find_one({
-                'type': 'personal-quarter',
-                'evaluated_year': year,
-                'evaluated_quarter': quarter
-            })
-            
-            if peer_doc and 'users' in peer_doc:
-                # users 배열에서 해당 user_id 찾기
-                for user in peer_doc['users']:
-                    if user.get('user_id') == user_id:
-                        keyword_summary = user.get('keyword_summary', {})
-                        positive_keywords = keyword_summary.get('positive', [])
-                        
-                        if isinstance(positive_keywords, list) and len(positive_keywords) > 0:
-                            # 상위 3개 키워드 추출
-                            top_3 = []
-                            for kw in positive_keywords[:3]:
-                                if isinstance(kw, dict) and 'keyword' in kw:
-                                    top_3.append(kw['keyword'])
-                                elif isinstance(kw, str):
-                                    top_3.append(kw)
-                            return top_3 if top_3 else ['키워드없음']
-                        else:
-                            return ['키워드없음']
-                
-                return ['키워드없음']  # 해당 사용자를 찾지 못한 경우
-            else:
-                return ['키워드없음']  # 문서나 users 배열이 없는 경우
+            # 해당 분기 문서 조회 (키워드 추출에 필요한 필드만)
+            peer_doc = peer_collection.find_one(
+                {
+                    'type': 'personal-quarter',
+                    'evaluated_year': year,
+                    'evaluated_quarter': quarter
+                },
+                projection={'users.user_id': 1, 'users.keyword_summary.positive': 1}
+            )
+            
+            # 키워드 형식(dict/str) 정규화는 적재 시 사용자당 한 번만 수행
+            for user in (peer_doc or {}).get('users', []):
+                positive_keywords = user.get('keyword_summary', {}).get('positive', [])
+                if not isinstance(positive_keywords, list):
+                    positive_keywords = []
                 
+                # 상위 3개 키워드 추출
+                top_3 = [
+                    kw['keyword'] if isinstance(kw, dict) else kw
+                    for kw in positive_keywords[:3]
+                    if (isinstance(kw, dict) and 'keyword' in kw) or isinstance(kw, str)
+                ]
+                peer_index[user.get('user_id')] = top_3 or NO_PEER_KEYWORDS
+            
         except Exception as e:
-            print(f'⚠️ 사용자 {user_id} 키워드 조회 오류: {e}')
-            return ['키워드없음']
+            # 일시적인 오류로 분기 전체가 '키워드없음'으로 고정되지 않도록 실패 결과는 캐시하지 않음
+            print(f'⚠️ {year}년 {quarter}분기 동료평가 키워드 조회 오류: {e}')
+            return {}
+        
+        self._peer_cache[cache_key] = peer_index
+        return peer_index
+    
+    def get_peer_keywords(self, user_id: int, year: int, quarter: int) -> List[str]:
+        """특정 사용자의 동료평가 긍정 키워드 상위 3개 가져오기"""
+        return self._load_peer_index(year, quarter).get(user_id, NO_PEER_KEYWORDS)
     
-    def generate_team_member_analysis(self, org_id: int, org_name: str, year: int, quarter: int, user_mapping: Dict) -> Dict:
-        """특정 팀의 멤버 분석 데이터 생성"""
+    def get_quarter_users_by_org(self, year: int, quarter: int) -> Optional[Dict[int, List[Dict]]]:
+        """해당 분기 ranking 문서를 한 번 조회해 사용자를 조직 ID별로 분류"""
         try:
-            print(f"\n🔄 {org_name} (조직 {org_id})의 {year}년 {quarter}분기 멤버 분석 시작")
-            
-            # ranking_results에서 해당 분기 데이터 가져오기
             ranking_collection = self.mongo_db['ranking_results']
-            ranking_doc = ranking_collection.find_one({
-                'type': 'personal-quarter',
-                'evaluated_year': year,
-                'evaluated_quarter': quarter
-            })
+            ranking_doc = ranking_collection.find_one(
+                {
+                    'type': 'personal-quarter',
+                    'evaluated_year': year,
+                    'evaluated_quarter': quarter
+                },
+                projection={
+                    'users.user_id': 1,
+                    'users.scores.final_score': 1,
+                    'users.ranking_info.organization_id': 1,
+                    'users.ranking_info.same_job_rank': 1,
+                    'users.ranking_info.same_job_user_count': 1
+                }
+            )
             
             if not ranking_doc:
                 print(f"❌ {year}년 {quarter}분기 ranking 데이터를 찾을 수 없습니다.")
                 return None
             
-            # 해당 조직의 사용자들만 필터링
-            org_users = [
-                user for user in ranking_doc.get('users', [])
-                if user.get('ranking_info', {}).get('organization_id') == org_id
-            ]
+            users_by_org = defaultdict(list)
+            for user in ranking_doc.get('users', []):
+                users_by_org[user.get('ranking_info', {}).get('organization_id')].append(user)
+            
+            return users_by_org
+            
+        except Exception as e:
+            print(f'❌ {year}년 {quarter}분기 ranking 데이터 조회 오류: {e}')
+            return None
+    
+    def generate_team_member_analysis(self, org_id: int, org_name: str, year: int, quarter: int, user_mapping: Dict, org_users: List[Dict]) -> Dict:
+        """특정 팀의 멤버 분석 데이터 생성 (org_users: 해당 분기 ranking 문서의 조직 소속 사용자)"""
+        try:
+            print(f"\n🔄 {org_name} (조직 {org_id})의 {year}년 {quarter}분기 멤버 분석 시작")
+            
+            # 분기 동료평가 키워드 인덱스 (분기당 한 번만 조회)
+            peer_index = self._load_peer_index(year, quarter)
             
             if not org_users:
                 print(f"❌ 조직 {org_id}에 속한 사용자가 없습니다.")
@@ -163,24 +242,23 @@ class CompleteTeamAnalysisSystem:
             
             print(f"📊 조직 {org_id}: {len(org_users)}명 발견")
             
-            # finalScore 기준으로 정렬 (내림차순)
-            org_users.sort(key=lambda x: x.get('scores', {}).get('final_score', 0), reverse=True)
+            # finalScore는 사용자당 한 번만 꺼내 (점수, 사용자) 쌍으로 정렬 (내림차순, 동점은 기존 순서 유지)
+            scored_users = [(user.get('scores', {}).get('final_score', 0), user) for user in org_users]
+            scored_users.sort(key=itemgetter(0), reverse=True)
             
             # 각 사용자의 분석 데이터 생성
             member_analysis = []
-            for rank, user in enumerate(org_users, 1):
+            for rank, (score, user) in enumerate(scored_users, 1):
                 user_id = user['user_id']
                 user_info = user_mapping.get(user_id, {})
                 
-                # 점수
-                score = user.get('scores', {}).get('final_score', 0)
-                
                 # 동료평가 키워드 (사용 가능한 경우에만)
-                peer_keywords = self.get_peer_keywords(user_id, year, quarter)
+                peer_keywords = peer_index.get(user_id, NO_PEER_KEYWORDS)
                 
                 # 직군 내 순위 계산
-                job_rank = user.get('ranking_info', {}).get('same_job_rank', 0)
-                job_total = user.get('ranking_info', {}).get('same_job_user_count', 0)
+                ranking_info = user.get('ranking_info', {})
+                job_rank = ranking_info.get('same_job_rank', 0)
+                job_total = ranking_info.get('same_job_user_count', 0)
                 
                 if job_total > 0:
                     rank_percentage = (job_rank / job_total) * 100
@@ -221,14 +299,12 @@ class CompleteTeamAnalysisSystem:
             traceback.print_exc()
             return None
     
-    def save_team_analysis(self, analysis_data: Dict) -> bool:
-        """팀 분석 결과를 ranking_results 컬렉션에 저장"""
+    def save_team_analysis(self, analysis_data: Dict, pending_ops: List) -> bool:
+        """팀 분석 결과를 분기별 저장 대기열(pending_ops)에 추가 (flush_team_analyses에서 일괄 저장)"""
         try:
             if not analysis_data:
                 return False
             
-            collection = self.mongo_db['ranking_results']
-            
             # 기존 데이터가 있으면 업데이트, 없으면 삽입
             filter_query = {
                 'type': 'team-quarter',
@@ -237,17 +313,27 @@ class CompleteTeamAnalysisSystem:
                 'evaluated_quarter': analysis_data['evaluated_quarter']
             }
             
-            result = collection.replace_one(filter_query, analysis_data, upsert=True)
+            pending_ops.append(pymongo.ReplaceOne(filter_query, analysis_data, upsert=True))
+            return True
             
-            if result.upserted_id:
-                print(f'✅ 조직 {analysis_data["organization_id"]} 팀 분석 결과 신규 저장: {result.upserted_id}')
-            else:
-                print(f'✅ 조직 {analysis_data["organization_id"]} 팀 분석 결과 업데이트 완료')
+        except Exception as e:
+            print(f'❌ 팀 분석 결과 저장 오류: {e}')
+            return False
+    
+    def flush_team_analyses(self, pending_ops: List) -> bool:
+        """분기별 대기열의 팀 분석 결과를 ranking_results 컬렉션에 unordered bulk_write로 일괄 저장"""
+        if not pending_ops:
+            return True
+        
+        try:
+            collection = self.mongo_db['ranking_results']
+            result = collection.bulk_write(pending_ops, ordered=False)
             
+            print(f'✅ 팀 분석 결과 일괄 저장 완료: 신규 {result.upserted_count}개, 업데이트 {result.modified_count}개')
             return True
             
         except Exception as e:
-            print(f'❌ 팀 분석 결과 저장 오류: {e}')
+            print(f'❌ 팀 분석 결과 일괄 저장 오류: {e}')
             return False
     
     def get_available_quarters(self) -> List[tuple]:
@@ -265,8 +351,13 @@ class CompleteTeamAnalysisSystem:
                 {"$sort": {"_id.year": 1, "_id.quarter": 1}}
             ]
             
-            quarters = list(collection.aggregate(pipeline))
-            quarter_list = [(q['_id']['year'], q['_id']['quarter']) for q in quarters]
+            # (type, evaluated_year, evaluated_quarter) 인덱스로 집계 (정렬은 파이프라인에서 완료)
+            cursor = collection.aggregate(
+                pipeline,
+                hint=[('type', 1), ('evaluated_year', 1), ('evaluated_quarter', 1)],
+                allowDiskUse=False
+            )
+            quarter_list = [(q['_id']['year'], q['_id']['quarter']) for q in cursor]
             
             print(f"📅 사용 가능한 분기: {quarter_list}")
             return quarter_list
@@ -275,16 +366,49 @@ class CompleteTeamAnalysisSystem:
             print(f'❌ 분기 데이터 조회 오류: {e}')
             return []
     
+    def _process_quarter(self, year: int, quarter: int, user_mapping: Dict, org_name_mapping: Dict[int, str], org_counts: Counter) -> Tuple[int, int]:
+        """한 분기의 모든 조직 멤버 분석 생성 후 일괄 저장 (성공 수, 실패 수 반환)"""
+        print(f"\n{'='*60}")
+        print(f"📅 {year}년 {quarter}분기 처리 시작")
+        print(f"{'='*60}")
+        
+        # 분기 ranking 문서는 한 번만 조회해 조직별로 분류
+        users_by_org = self.get_quarter_users_by_org(year, quarter)
+        if users_by_org is None:
+            print(f"📊 {year}년 {quarter}분기 결과: 성공 0개, 실패 {len(org_counts)}개")
+            return 0, len(org_counts)
+        
+        quarter_fail = 0
+        pending_ops = []
+        for org_id in sorted(org_counts):
+            org_name = org_name_mapping.get(org_id, f'조직{org_id}')
+            
+            # 팀 분석 데이터 생성
+            analysis_data = self.generate_team_member_analysis(
+                org_id, org_name, year, quarter, user_mapping, users_by_org.get(org_id, [])
+            )
+            
+            # 저장 대기열에 추가 (분기 단위로 일괄 저장)
+            if not self.save_team_analysis(analysis_data, pending_ops):
+                quarter_fail += 1
+        
+        # 분기의 모든 조직 결과를 한 번의 bulk_write로 저장
+        if self.flush_team_analyses(pending_ops):
+            quarter_success = len(pending_ops)
+        else:
+            quarter_success = 0
+            quarter_fail += len(pending_ops)
+        
+        print(f"📊 {year}년 {quarter}분기 결과: 성공 {quarter_success}개, 실패 {quarter_fail}개")
+        return quarter_success, quarter_fail
+    
     def process_all_teams_all_quarters(self):
         """모든 팀의 모든 분기 멤버 분석 처리"""
         try:
             print(f"\n🚀 모든 팀 모든 분기 멤버 분석 시작")
             
-            # 1. 사용자 정보 매핑 가져오기
-            user_mapping = self.get_user_job_mapping()
-            
-            # 2. 조직 이름 매핑 가져오기
-            org_name_mapping = self.get_organization_names()
+            # 1~2. 사용자/직군/조직 정보를 한 번에 조회 (조직별 인원 수 포함)
+            user_mapping, org_name_mapping, org_counts = self.get_user_org_job_info()
             
             # 3. 사용 가능한 분기 목록 가져오기
             available_quarters = self.get_available_quarters()
@@ -293,53 +417,19 @@ class CompleteTeamAnalysisSystem:
                 print("❌ 처리할 분기 데이터가 없습니다.")
                 return
             
-            # 4. 조직 목록 가져오기
-            with self.maria_connection.cursor(pymysql.cursors.DictCursor) as cursor:
-                cursor.execute("""
-                    SELECT organization_id, COUNT(*) as user_count
-                    FROM users 
-                    WHERE organization_id IS NOT NULL
-                    GROUP BY organization_id
-                    ORDER BY organization_id
-                """)
-                org_counts = cursor.fetchall()
-            
             print(f"📋 처리 대상: {len(org_counts)}개 조직 × {len(available_quarters)}개 분기 = {len(org_counts) * len(available_quarters)}개 작업")
             
-            total_success = 0
-            total_fail = 0
+            # 4. 분기별 처리를 스레드 풀에서 동시에 실행 (MongoClient 커넥션 풀 공유)
+            with ThreadPoolExecutor(max_workers=min(QUARTER_MAX_WORKERS, len(available_quarters))) as executor:
+                results = list(executor.map(
+                    lambda year_quarter: self._process_quarter(
+                        *year_quarter, user_mapping, org_name_mapping, org_counts
+                    ),
+                    available_quarters
+                ))
             
-            # 5. 각 분기별로 모든 조직 처리
-            for year, quarter in available_quarters:
-                print(f"\n{'='*60}")
-                print(f"📅 {year}년 {quarter}분기 처리 시작")
-                print(f"{'='*60}")
-                
-                quarter_success = 0
-                quarter_fail = 0
-                
-                for org in org_counts:
-                    org_id = org['organization_id']
-                    org_name = org_name_mapping.get(org_id, f'조직{org_id}')
-                    
-                    # 팀 분석 데이터 생성
-                    analysis_data = self.generate_team_member_analysis(
-                        org_id, org_name, year, quarter, user_mapping
-                    )
-                    
-                    if analysis_data:
-                        # 저장
-                        if self.save_team_analysis(analysis_data):
-                            quarter_success += 1
-                            total_success += 1
-                        else:
-                            quarter_fail += 1
-                            total_fail += 1
-                    else:
-                        quarter_fail += 1
-                        total_fail += 1
-                
-                print(f"📊 {year}년 {quarter}분기 결과: 성공 {quarter_success}개, 실패 {quarter_fail}개")
+            total_success = sum(success for success, _ in results)
+            total_fail = sum(fail for _, fail in results)
             
             print(f"\n🎉 전체 처리 완료!")
             print(f"✅ 총 성공: {total_success}개")
@@ -357,29 +447,46 @@ class CompleteTeamAnalysisSystem:
             
             collection = self.mongo_db['ranking_results']
             
-            # team-quarter 타입 문서 조회
-            team_docs = list(collection.find({'type': 'team-quarter'}))
+            # team-quarter 타입 문서 조회 (멤버 수는 서버에서 계산하고 출력할 상위 3명만 전송)
+            cursor = collection.aggregate([
+                {'$match': {'type': 'team-quarter'}},
+                {'$project': {
+                    '_id': 0,
+                    'organization_id': 1,
+                    'organization_name': 1,
+                    'evaluated_year': 1,
+                    'evaluated_quarter': 1,
+                    'memberCount': {'$size': {'$ifNull': ['$memberAnalysis', []]}},
+                    'memberAnalysis': {'$slice': [{'$ifNull': ['$memberAnalysis', []]}, 3]}
+                }}
+            ])
+            
+            # 커서를 순회하며 분기별 그룹화 및 샘플 후보(최근 분기, 조직 1) 선정
+            by_quarter = {}
+            total_docs = 0
+            latest_doc = None
+            first_org1_doc = None
+            for doc in cursor:
+                total_docs += 1
+                key = f"{doc['evaluated_year']}년 {doc['evaluated_quarter']}분기"
+                by_quarter.setdefault(key, []).append(doc)
+                if latest_doc is None or (doc['evaluated_year'], doc['evaluated_quarter']) > (latest_doc['evaluated_year'], latest_doc['evaluated_quarter']):
+                    latest_doc = doc
+                if first_org1_doc is None and doc['organization_id'] == 1:
+                    first_org1_doc = doc
             
-            if not team_docs:
+            if not total_docs:
                 print("❌ 저장된 팀 분석 결과가 없습니다.")
                 return
             
-            print(f"📋 총 {len(team_docs)}개의 팀 분석 결과 저장됨")
-            
-            # 분기별 그룹화
-            by_quarter = {}
-            for doc in team_docs:
-                key = f"{doc['evaluated_year']}년 {doc['evaluated_quarter']}분기"
-                if key not in by_quarter:
-                    by_quarter[key] = []
-                by_quarter[key].append(doc)
+            print(f"📋 총 {total_docs}개의 팀 분석 결과 저장됨")
             
             for quarter_key, docs in sorted(by_quarter.items()):
                 print(f"\n🗓️ {quarter_key}:")
                 for doc in sorted(docs, key=lambda x: x['organization_id']):
                     org_id = doc['organization_id']
                     org_name = doc['organization_name']
-                    member_count = len(doc.get('memberAnalysis', []))
+                    member_count = doc['memberCount']
                     print(f"   조직 {org_id} ({org_name}): {member_count}명")
                     
                     # 1위 사용자 정보 출력
@@ -388,11 +495,10 @@ class CompleteTeamAnalysisSystem:
                         print(f"     1위: {top_member['name']} ({top_member['score']}점, {top_member['role']})")
             
             # 샘플 결과 상세 출력 (조직 1, 가장 최근 분기)
-            latest_doc = max(team_docs, key=lambda x: (x['evaluated_year'], x['evaluated_quarter']))
             if latest_doc['organization_id'] == 1:
                 sample_doc = latest_doc
             else:
-                sample_doc = next((doc for doc in team_docs if doc['organization_id'] == 1), latest_doc)
+                sample_doc = first_org1_doc or latest_doc
             
             if sample_doc:
                 print(f"\n📝 샘플 결과 상세 ({sample_doc['organization_name']}, {sample_doc['evaluated_year']}년 {sample_doc['evaluated_quarter']}분기):")
@@ -412,6 +518,7 @@ class CompleteTeamAnalysisSystem:
         try:
             if self.maria_connection:
                 self.maria_connection.close()
+                self.maria_connection = None
                 print('✅ MariaDB 연결 해제')
             if self.mongo_client:
                 self.mongo_client.close()
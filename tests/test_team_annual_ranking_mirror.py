@@ -0,0 +1,98 @@
+"""users 미러 동기화 후 서버 측/Python 팀 랭킹 일치 검증
+
+MONGO_TEST_URL 환경 변수로 지정한 MongoDB에 임시 DB를 만들어 실행한다 (미지정 시 skip).
+"""
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+pymongo = pytest.importorskip('pymongo')
+
+AGENTS_DIR = Path(__file__).resolve().parents[1] / 'app' / 'team_annual_reports' / 'agents'
+sys.path.insert(0, str(AGENTS_DIR))
+
+from team_annual_ranking_info import AnnualTeamRankingSystem  # noqa: E402
+
+MONGO_TEST_URL = os.getenv('MONGO_TEST_URL')
+YEAR = 2024
+
+
+def _score(overall, quantitative, qualitative, peer):
+    return {'final_score_info': {
+        'overall_final_score': overall,
+        'category_averages': {
+            'quantitative': quantitative,
+            'qualitative': qualitative,
+            'peer': peer
+        }
+    }}
+
+
+def _user(name, organization_id):
+    return {'name': name, 'organization_id': organization_id, 'organization_name': f'조직{organization_id}'}
+
+
+@pytest.fixture
+def system():
+    if not MONGO_TEST_URL:
+        pytest.skip('MONGO_TEST_URL이 설정되지 않음')
+    client = pymongo.MongoClient(MONGO_TEST_URL, serverSelectionTimeoutMS=2000)
+    db_name = f'test_ranking_mirror_{uuid.uuid4().hex[:8]}'
+    system = AnnualTeamRankingSystem()
+    system.mongo_client = client
+    system.mongo_db = client[db_name]
+    system.mongo_db['final_score_results'].insert_one({
+        'type': 'personal-final-score-annual',
+        'evaluated_year': YEAR,
+        'users': {
+            '1': _score(90.123, 80, 85, 70),
+            '2': _score(75, 70, 72.456, 68),
+            '3': _score(88, 81, 79, 90),
+            '4': _score(75, 60, 65, 99),
+            '5': _score(60, 55, 50, 40)
+        }
+    })
+    try:
+        yield system
+    finally:
+        client.drop_database(db_name)
+        client.close()
+
+
+def _python_rankings(system, user_org_mapping, annual_scores):
+    users_by_org = {}
+    for user_id, user_info in user_org_mapping.items():
+        users_by_org.setdefault(user_info['organization_id'], []).append((user_id, user_info['name']))
+    rankings = {
+        org_id: system._build_team_ranking(members, annual_scores)
+        for org_id, members in users_by_org.items()
+    }
+    return {org_id: ranking for org_id, ranking in rankings.items() if ranking}
+
+
+def test_server_side_ranking_matches_python_after_user_removed(system):
+    user_org_mapping = {
+        1: _user('가', 10),
+        2: _user('나', 10),
+        3: _user('다', 20),
+        4: _user('라', 10),
+        5: _user('마', 20)
+    }
+    assert system.sync_user_mirror(user_org_mapping)
+
+    # 사용자 2 삭제, 사용자 3 조직 해제 (organization_id IS NULL로 매핑에서 빠짐)
+    del user_org_mapping[2]
+    del user_org_mapping[3]
+    assert system.sync_user_mirror(user_org_mapping)
+
+    annual_scores = system.get_annual_final_scores(YEAR)
+    expected = _python_rankings(system, user_org_mapping, annual_scores)
+    actual = system.get_team_rankings_server_side(YEAR)
+
+    assert actual == expected
+    assert system.mongo_db['users'].count_documents({}) == len(user_org_mapping)
+    assert [member['name'] for member in actual[10]] == ['가', '라']
+    assert [member['name'] for member in actual[20]] == ['마']